@@ -0,0 +1,196 @@
+"""Headless benchmarks of every page's compute and render path, compared against stored baselines.
+
+Examples:
+    python benchmark.py                   quick suite, compared with benchmark_baseline.json
+    python benchmark.py --full            1-30 qubits and 10^2-10^7 shots
+    python benchmark.py -k interference   only cases whose name contains the text
+    python benchmark.py --save            store this run as the new baseline
+
+Each case reports its median time over several repeats and its peak traced
+memory. The exit status is 1 when a case is slower or uses more memory than
+its baseline by more than the tolerance; times are compared by their minimum,
+which other load on the machine disturbs least.
+"""
+import matplotlib
+matplotlib.use("Agg")  # Headless: nothing here may open a Tk window
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+import numpy as np
+import qiskit
+import diagrams
+import engine
+import marginals
+import noise
+import render
+import simulation
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+# Parameter grids
+QUICK = {"qubits": [1, 5, 10, 20], "shots": [10 ** 2, 10 ** 4, 10 ** 6]}
+FULL = {"qubits": [1, 2, 5, 10, 15, 20, 25, 30], "shots": [10 ** k for k in range(2, 8)]}
+
+MIN_REPEATS = 3  # Every case runs at least this often...
+MIN_SECONDS = 0.2  # ...and keeps repeating until it has run this long
+MAX_REPEATS = 100
+TIME_TOLERANCE = 0.5  # A case regresses when its minimum time is 50% above the baseline
+MEMORY_TOLERANCE = 0.25
+TIME_FLOOR = 0.005  # Differences below 5 ms or 1 MB are treated as noise
+MEMORY_FLOOR = 2 ** 20
+MEMORY_BUDGET = 2 * 2 ** 30  # Cases estimated to need more memory are skipped
+
+
+# Function to list every benchmark case for a parameter grid
+def cases(grid):
+    """Yields (name, setup, function, estimated bytes); only function(setup()) is timed."""
+    # Single-qubit page: H circuit, statevector, Bloch sphere update (blit)
+    yield "sqb/build", lambda: None, lambda _: simulation.single_gate_circuit(1, "h", 0), 0
+    qc = simulation.single_gate_circuit(1, "h", 0)
+    yield "sqb/simulate", lambda: qc, lambda qc: simulation.simulate(qc, use_cache=False), 0
+    yield ("sqb/render", lambda: (render.BlochView(None), simulation.simulate(qc, use_cache=False)[1]),
+           lambda args: args[0].update(args[1]), 0)
+    yield "sqb/diagram", lambda: qc, diagrams.render_png, 0
+
+    # Multi-qubit page: single-gate circuit, statevector, histogram, city or Bloch, diagram
+    for n in grid["qubits"]:
+        state_bytes = 16 * 2 ** n
+        yield f"mqb/build/q={n}", lambda: None, lambda _, n=n: simulation.single_gate_circuit(n, "h", 0), 0
+
+        def simulated(n=n):
+            qc = simulation.single_gate_circuit(n, "h", 0)
+            return qc, simulation.simulate(qc, use_cache=False)[1]
+
+        yield (f"mqb/simulate/q={n}", lambda n=n: simulation.single_gate_circuit(n, "h", 0),
+               lambda qc: simulation.simulate(qc, use_cache=False), 2 * state_bytes)
+        yield (f"mqb/render-histogram/q={n}", lambda simulated=simulated: (render.HistogramView(None), simulated()),
+               lambda args: args[0].update_probabilities(engine.probabilities(args[1][1]), args[1][0].num_qubits),
+               3 * state_bytes)
+        if n <= 2:
+            yield (f"mqb/render-bloch/q={n}", lambda simulated=simulated: (render.BlochView(None), simulated()),
+                   lambda args: args[0].update(args[1][1]), 3 * state_bytes)
+        else:
+            yield (f"mqb/render-city/q={n}", lambda simulated=simulated: (render.CityView(None), simulated()),
+                   lambda args: args[0].update(args[1][1]), 3 * state_bytes)
+        if 2 <= n <= marginals.MAX_PAIR_QUBITS:
+            yield (f"mqb/marginals/q={n}", simulated,
+                   lambda args: marginals.correlations(args[1], args[0].num_qubits), 5 * state_bytes)
+        yield f"mqb/diagram/q={n}", lambda n=n: simulation.single_gate_circuit(n, "h", 0), diagrams.render_png, 0
+
+    # Interference page: circuit, noiseless and noisy sampling, histogram of counts, text diagram
+    noise_model = noise.NoiseModel(depolarizing=0.01, readout=0.01)
+    for n in grid["qubits"]:
+        circuit = lambda n=n: simulation.interference_circuit(n)
+        yield f"interference/build/q={n}", lambda: None, lambda _, circuit=circuit: circuit(), 0
+        yield f"interference/diagram/q={n}", circuit, lambda qc: str(qc.draw(output="text")), 0
+        for shots in grid["shots"]:
+            counts_bytes = min(shots, 2 ** n) * (120 + n)  # Rough size of a counts dict
+            yield (f"interference/sample/q={n}/shots={shots}", circuit,
+                   lambda qc, shots=shots: simulation.sample(qc, shots, seed=1, use_cache=False), counts_bytes)
+            yield (f"interference/noisy-sample/q={n}/shots={shots}", circuit,
+                   lambda qc, shots=shots: simulation.sample(qc, shots, seed=1, use_cache=False, noise_model=noise_model),
+                   counts_bytes + 8 * min(shots * n, noise.CHUNK_BITS))
+            yield (f"interference/render/q={n}/shots={shots}",
+                   lambda circuit=circuit, shots=shots: (render.HistogramView(None),
+                                                         simulation.sample(circuit(), shots, seed=1, use_cache=False)[1]),
+                   lambda args: args[0].update(args[1]), 2 * counts_bytes)
+
+
+# Function to time one case and track its memory
+def measure(function, argument):
+    """Returns the median and minimum time over the repeats and the peak traced memory of one run."""
+    times = []
+    start = time.perf_counter()
+    while len(times) < MIN_REPEATS or (time.perf_counter() - start < MIN_SECONDS and len(times) < MAX_REPEATS):
+        begin = time.perf_counter()
+        function(argument)
+        times.append(time.perf_counter() - begin)
+    tracemalloc.start()  # Tracing slows allocation down, so memory gets its own run
+    function(argument)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"median": statistics.median(times), "min": min(times), "repeats": len(times), "peak_bytes": peak}
+
+
+# Function to find cases that got slower or bigger than the baseline
+def compare(results, baseline, time_tolerance=TIME_TOLERANCE, memory_tolerance=MEMORY_TOLERANCE):
+    """Returns {name: reason} for every regressed case that also has a baseline entry."""
+    regressions = {}
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        reasons = []
+        if (result["min"] > base["min"] * (1 + time_tolerance)
+                and result["min"] - base["min"] > TIME_FLOOR):
+            reasons.append(f"time {base['min'] * 1e3:.2f} -> {result['min'] * 1e3:.2f} ms")
+        if (result["peak_bytes"] > base["peak_bytes"] * (1 + memory_tolerance)
+                and result["peak_bytes"] - base["peak_bytes"] > MEMORY_FLOOR):
+            reasons.append(f"memory {base['peak_bytes'] / 2 ** 20:.1f} -> {result['peak_bytes'] / 2 ** 20:.1f} MB")
+        if reasons:
+            regressions[name] = ", ".join(reasons)
+    return regressions
+
+
+# Function to describe the machine a baseline was recorded on
+def environment():
+    return {"python": platform.python_version(), "numpy": np.__version__, "qiskit": qiskit.__version__,
+            "machine": platform.machine(), "system": platform.system(), "cpus": os.cpu_count()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the simulator headless.")
+    parser.add_argument("--full", action="store_true", help="1-30 qubits and 10^2-10^7 shots")
+    parser.add_argument("-k", dest="keyword", default="", help="only run cases whose name contains this text")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="write the results to the baseline file")
+    parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+    parser.add_argument("--memory-tolerance", type=float, default=MEMORY_TOLERANCE)
+    parser.add_argument("--memory-budget", type=float, default=MEMORY_BUDGET / 2 ** 30, help="GiB")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as file:
+            baseline = json.load(file).get("results", {})
+
+    results = {}
+    for name, setup, function, estimated_bytes in cases(FULL if args.full else QUICK):
+        if args.keyword not in name:
+            continue
+        if estimated_bytes > args.memory_budget * 2 ** 30:
+            print(f"{name:<42} skipped (needs about {estimated_bytes / 2 ** 30:.1f} GiB)")
+            continue
+        results[name] = result = measure(function, setup())
+        base = baseline.get(name)
+        change = f"{result['min'] / base['min'] - 1:+7.1%}" if base else "    new"
+        print(f"{name:<42} {result['median'] * 1e3:10.3f} ms {result['peak_bytes'] / 2 ** 20:9.2f} MB  {change}")
+
+    if args.save:
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as file:
+                stored = json.load(file).get("results", {})
+        else:
+            stored = {}
+        stored.update(results)  # A filtered run only replaces the cases it ran
+        with open(args.baseline, "w") as file:
+            json.dump({"environment": environment(), "results": stored}, file, indent=1, sort_keys=True)
+        print(f"Saved {len(results)} results to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.time_tolerance, args.memory_tolerance)
+    for name, reason in regressions.items():
+        print(f"REGRESSION {name}: {reason}")
+    if not baseline:
+        print("No baseline yet; run with --save to record one.")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
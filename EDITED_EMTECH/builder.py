@@ -0,0 +1,87 @@
+import threading
+from qiskit import QuantumCircuit
+import engine
+
+
+class CircuitBuilder:
+    """Circuit built one gate at a time on top of a retained statevector.
+
+    Appending a gate updates the statevector in place in O(2^n). Undo restores
+    the nearest checkpoint and replays at most checkpoint_interval gates; redo
+    re-applies one gate. Checkpoints are thinned out (and the interval doubled)
+    whenever they would use more than max_checkpoint_bytes.
+    """
+
+    def __init__(self, num_qubits, checkpoint_interval=16, max_checkpoint_bytes=256 * 2 ** 20):
+        self.num_qubits = num_qubits
+        self.checkpoint_interval = checkpoint_interval
+        self.max_checkpoint_bytes = max_checkpoint_bytes
+        self.gates = []  # Every gate ever appended; the ones past position can be redone
+        self.position = 0  # Number of gates currently applied
+        self.state = engine.zero_state(num_qubits)
+        self.checkpoints = {0: self.state.copy()}
+        self.lock = threading.Lock()  # Operations may run on worker threads
+
+    @property
+    def can_undo(self):
+        return self.position > 0
+
+    @property
+    def can_redo(self):
+        return self.position < len(self.gates)
+
+    def append(self, name, qubits):
+        """Applies a new gate and drops anything that could have been redone."""
+        if name not in engine.NumpyEngine.gates or name in engine.ROTATION_GATES:
+            raise ValueError(f"Unsupported gate type '{name}'.")
+        if len(set(qubits)) != len(qubits) or not all(0 <= q < self.num_qubits for q in qubits):
+            raise ValueError("Gate qubits must be distinct and within the range of available qubits.")
+        with self.lock:
+            del self.gates[self.position:]
+            for index in [i for i in self.checkpoints if i > self.position]:
+                del self.checkpoints[index]
+            self.gates.append((name, tuple(qubits)))
+            self._step_forward()
+            return self.snapshot()
+
+    def undo(self):
+        """Steps back one gate by replaying from the nearest checkpoint."""
+        with self.lock:
+            if self.can_undo:
+                self._seek(self.position - 1)
+            return self.snapshot()
+
+    def redo(self):
+        """Re-applies the next undone gate."""
+        with self.lock:
+            if self.can_redo:
+                self._step_forward()
+            return self.snapshot()
+
+    def snapshot(self):
+        """Returns (circuit, statevector copy) for the gates currently applied."""
+        qc = QuantumCircuit(self.num_qubits)
+        for name, qubits in self.gates[:self.position]:
+            getattr(qc, name)(*qubits)
+        return qc, self.state.copy()
+
+    def _step_forward(self):
+        name, qubits = self.gates[self.position]
+        engine.apply_gate(self.state, self.num_qubits, name, qubits)
+        self.position += 1
+        if self.position % self.checkpoint_interval == 0 and self.position not in self.checkpoints:
+            self.checkpoints[self.position] = self.state.copy()
+            self._thin_checkpoints()
+
+    def _seek(self, position):
+        start = max(i for i in self.checkpoints if i <= position)
+        self.state[:] = self.checkpoints[start]
+        for name, qubits in self.gates[start:position]:
+            engine.apply_gate(self.state, self.num_qubits, name, qubits)
+        self.position = position
+
+    def _thin_checkpoints(self):
+        while len(self.checkpoints) * self.state.nbytes > self.max_checkpoint_bytes and len(self.checkpoints) > 1:
+            self.checkpoint_interval *= 2
+            for index in [i for i in self.checkpoints if i % self.checkpoint_interval]:
+                del self.checkpoints[index]
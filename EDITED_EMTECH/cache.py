@@ -0,0 +1,219 @@
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import os
+import threading
+import numpy as np
+
+# Default on-disk location, overridable with the QSIM_CACHE_DIR environment variable
+CACHE_DIR = os.environ.get("QSIM_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "emtech_qsim"))
+
+
+# Function to build a canonical key for a circuit and its run options
+def circuit_key(qc, **options):
+    """Returns a SHA-256 hex digest of the circuit structure plus options such as shots, seed and noise."""
+    operations = []
+    for instruction in qc.data:
+        operations.append([
+            instruction.operation.name,
+            [qc.find_bit(qubit).index for qubit in instruction.qubits],
+            [qc.find_bit(clbit).index for clbit in instruction.clbits],
+            [str(param) for param in instruction.operation.params],
+        ])
+    payload = {
+        "qubits": qc.num_qubits,
+        "clbits": qc.num_clbits,
+        "operations": operations,
+        "options": options,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+# Functions to store counts as compact arrays
+def pack_counts(counts):
+    """Packs {bitstring: count} into (bit-packed keys, counts, register widths) arrays.
+
+    Keys may hold several space-separated registers (Qiskit's multi-register
+    counts) as long as every key has the same layout; raises ValueError otherwise.
+    """
+    values = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+    first = next(iter(counts), "")
+    registers = np.array([len(part) for part in first.split(" ")])
+    characters = np.frombuffer("".join(counts).encode(), dtype=np.uint8)
+    if characters.size != len(counts) * len(first):
+        raise ValueError("Counts keys differ in length.")
+    characters = characters.reshape(len(counts), len(first))
+    spaces = characters == ord(" ")
+    if (spaces != spaces[:1]).any() or not np.isin(characters[~spaces], (ord("0"), ord("1"))).all():
+        raise ValueError("Counts keys must be bitstrings with the same register layout.")
+    bits = characters[:, ~spaces[0]] == ord("1") if len(counts) else np.zeros((0, 0), bool)
+    return np.packbits(bits, axis=1), values, registers
+
+
+def unpack_counts(packed, values, registers):
+    """Inverse of pack_counts (registers may also be a single width)."""
+    registers = [int(width) for width in np.atleast_1d(registers)]
+    width = sum(registers)
+    bits = np.unpackbits(packed, axis=1, count=width).astype(bool) if width else np.zeros((len(values), 0), bool)
+    keys = [row.tobytes().decode() for row in (bits + ord("0")).astype(np.uint8)]
+    if len(registers) > 1:
+        ends = np.cumsum(registers)
+        keys = [" ".join(key[end - size:end] for size, end in zip(registers, ends)) for key in keys]
+    return {key: int(v) for key, v in zip(keys, values)}
+
+
+class ResultCache:
+    """Two-tier cache of simulation results keyed by circuit_key().
+
+    The memory tier is an LRU bounded by max_memory_bytes. The disk tier keeps
+    statevectors as .npy files (loaded memory-mapped) and counts as .npz
+    arrays, evicting the least recently used files past max_disk_bytes.
+    Disk writes run on a background thread, so put() never blocks the Tk
+    thread on a large np.save; flush() waits for them.
+    """
+
+    def __init__(self, directory=CACHE_DIR, max_memory_bytes=256 * 2 ** 20, max_disk_bytes=2 ** 30):
+        self.directory = directory
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.memory = OrderedDict()  # key -> (value, size in bytes)
+        self.memory_bytes = 0
+        self.hits = {"memory": 0, "disk": 0}
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.disk_lock = threading.Lock()  # Serializes writes, eviction and clearing of the disk tier
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-writer")
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, key):
+        """Returns the cached statevector or counts for key, or None."""
+        with self.lock:
+            if key in self.memory:
+                self.memory.move_to_end(key)
+                self.hits["memory"] += 1
+                return self.memory[key][0]
+            value = self._load(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self.hits["disk"] += 1
+            self._remember(key, value)
+            return value
+
+    def put(self, key, value):
+        """Stores a statevector (ndarray) or counts (dict) in memory now and on disk in the background."""
+        with self.lock:
+            self._remember(key, value)
+        self.writer.submit(self._save, key, value)
+
+    def flush(self):
+        """Waits until every put() so far has reached the disk tier."""
+        self.writer.submit(lambda: None).result()
+
+    def stats(self):
+        """Returns hit/miss counts and the size of each tier."""
+        lookups = self.hits["memory"] + self.hits["disk"] + self.misses
+        return {
+            "memory_hits": self.hits["memory"],
+            "disk_hits": self.hits["disk"],
+            "misses": self.misses,
+            "hit_rate": (lookups - self.misses) / lookups if lookups else 0.0,
+            "memory_entries": len(self.memory),
+            "memory_bytes": self.memory_bytes,
+            "disk_bytes": sum(size for _, size, _ in self._disk_files()),
+        }
+
+    def clear(self):
+        """Empties both tiers."""
+        with self.lock:
+            self.memory.clear()
+            self.memory_bytes = 0
+        with self.disk_lock:
+            for path, _, _ in self._disk_files():
+                self._remove(path)
+
+    def _remember(self, key, value):
+        size = value.nbytes if isinstance(value, np.ndarray) else 64 * (len(value) + 1)
+        if size > self.max_memory_bytes:
+            return
+        if key in self.memory:
+            self.memory_bytes -= self.memory.pop(key)[1]
+        self.memory[key] = (value, size)
+        self.memory_bytes += size
+        while self.memory_bytes > self.max_memory_bytes:
+            _, (_, evicted) = self.memory.popitem(last=False)
+            self.memory_bytes -= evicted
+
+    def _path(self, key, extension):
+        return os.path.join(self.directory, key + extension)
+
+    def _load(self, key):
+        try:
+            path = self._path(key, ".npy")
+            if os.path.exists(path):
+                os.utime(path)  # Mark as recently used for eviction
+                return np.load(path, mmap_mode="r")
+            path = self._path(key, ".npz")
+            if os.path.exists(path):
+                os.utime(path)
+                with np.load(path) as data:
+                    registers = data["registers"] if "registers" in data.files else data["width"]  # Older entries
+                    return unpack_counts(data["keys"], data["values"], registers)
+        except (OSError, ValueError):
+            return None  # Unreadable or partially written entry
+        return None
+
+    def _save(self, key, value):
+        extension = ".npy" if isinstance(value, np.ndarray) else ".npz"
+        if extension == ".npy" and value.nbytes > self.max_disk_bytes:
+            return  # Would evict everything else and still not fit
+        path = self._path(key, extension)
+        temporary = path + ".tmp"  # Written aside and renamed, so readers never see a partial file
+        try:
+            with self.disk_lock:
+                with open(temporary, "wb") as file:
+                    if extension == ".npy":
+                        np.save(file, np.ascontiguousarray(value))
+                    else:
+                        keys, values, registers = pack_counts(value)
+                        np.savez(file, keys=keys, values=values, registers=registers)
+                os.replace(temporary, path)
+                self._evict_disk()
+        except (OSError, ValueError):
+            self._remove(temporary)  # The disk tier is best effort; the memory tier still holds the result
+
+    def _disk_files(self):
+        files = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith((".npy", ".npz")):
+                stat = entry.stat()
+                files.append((entry.path, stat.st_size, stat.st_mtime))
+        return files
+
+    def _evict_disk(self):
+        files = sorted(self._disk_files(), key=lambda f: f[2])  # Least recently used first
+        total = sum(size for _, size, _ in files)
+        for path, size, _ in files:
+            if total <= self.max_disk_bytes:
+                break
+            self._remove(path)
+            total -= size
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # Still memory-mapped somewhere (Windows) or already gone
+
+
+_cache = None
+
+
+# Function to get the shared cache
+def get_cache():
+    """Returns the process-wide ResultCache, creating it on first use."""
+    global _cache
+    if _cache is None:
+        _cache = ResultCache()
+    return _cache
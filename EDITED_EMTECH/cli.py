@@ -0,0 +1,134 @@
+"""Headless command-line front end to the simulation library; prints one JSON object per line.
+
+Examples:
+    python cli.py run --qubits 3 --noise 0.1 --shots 1000 --seed 7
+    python cli.py run --circuit gate --qubits 2 --gate h --target 0 --output probabilities
+    python cli.py batch configs.jsonl            (one simulation.run() config per line, "-" for stdin)
+    python cli.py sweep --qubits 2-8 --noise 0-1:11 --shots 1000 --seed 1
+    python cli.py --trace trace.json run --qubits 20    (Chrome trace of every stage; timings on stderr)
+    python cli.py replay session.qsl --engine aer        (rerun and verify a recorded GUI session)
+"""
+import argparse
+import json
+import sys
+import engine
+import noise
+import session
+import simulation
+import sweep
+import tracing
+import workers
+
+
+# Function to print one result as a JSON line
+def emit(result, output=sys.stdout):
+    output.write(json.dumps(result) + "\n")
+    output.flush()  # Let readers of a pipe see each result as soon as it is ready
+
+
+# Function to read configurations from a JSON-lines file
+def read_configs(path):
+    """Yields the configuration dict on each non-empty line of path ("-" reads standard input)."""
+    lines = sys.stdin if path == "-" else open(path)
+    try:
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+
+
+# Function to build the argument parser
+def build_parser():
+    parser = argparse.ArgumentParser(description="Run quantum simulations without the GUI.")
+    parser.add_argument("--trace", metavar="PATH", help="save a Chrome trace of every stage and print stage timings")
+    parser.add_argument("--trace-memory", action="store_true", help="also record peak memory per stage (slower)")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run one configuration")
+    run.add_argument("--circuit", choices=["interference", "gate", "qasm"], default="interference")
+    run.add_argument("--qubits", type=int, default=2)
+    run.add_argument("--no-hadamard", dest="hadamard", action="store_false")
+    run.add_argument("--no-cnot", dest="cnot", action="store_false")
+    run.add_argument("--pauli-x", action="store_true")
+    run.add_argument("--noise", type=float, default=0.0, help="error probability of the --noise-type channel")
+    run.add_argument("--noise-type", choices=noise.CHANNELS, default="bit_flip")
+    for channel in noise.CHANNELS:
+        run.add_argument("--" + channel.replace("_", "-"), type=float, help=f"{channel} probability (per shot)")
+    run.add_argument("--gate", default="h")
+    run.add_argument("--target", type=int, default=0)
+    run.add_argument("--qasm-file", help="OpenQASM 2 file for --circuit qasm")
+    run.add_argument("--output", choices=["counts", "probabilities", "statevector"], default="counts")
+    run.add_argument("--precision", choices=list(simulation.PRECISIONS), default="double",
+                     help="statevector precision; single (complex64) halves memory")
+    run.add_argument("--shots", type=int, default=1024)
+    run.add_argument("--seed", type=int)
+    run.add_argument("--cache", action="store_true", help="use the on-disk result cache")
+
+    batch = commands.add_parser("batch", help="run every configuration of a JSON-lines file in parallel")
+    batch.add_argument("path", help='file with one config per line, or "-" for stdin')
+
+    sweep_command = commands.add_parser("sweep", help="interference parameter sweep (same rows as the GUI)")
+    sweep_command.add_argument("--qubits", default="2-5", help='range such as "2-8"')
+    sweep_command.add_argument("--noise", default="0-1:11", help='range such as "0-1:11" (from-to:steps)')
+    sweep_command.add_argument("--noise-type", choices=noise.CHANNELS, default="bit_flip")
+    sweep_command.add_argument("--no-hadamard", dest="hadamard", action="store_false")
+    sweep_command.add_argument("--no-cnot", dest="cnot", action="store_false")
+    sweep_command.add_argument("--pauli-x", action="store_true")
+    sweep_command.add_argument("--shots", type=int, default=1024)
+    sweep_command.add_argument("--seed", type=int)
+
+    replay = commands.add_parser("replay", help="rerun a recorded session and verify its results")
+    replay.add_argument("path", help="session log written with QSIM_SESSION (see main.py)")
+    replay.add_argument("--engine", choices=[sim.name for sim in engine.ENGINES],
+                        help="also run every circuit on this engine and compare time and results")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.trace:
+        tracing.enable(memory=args.trace_memory)
+    try:
+        if args.command == "run":
+            circuit_options = {"interference": ["qubits", "hadamard", "cnot", "pauli_x"],
+                               "gate": ["qubits", "gate", "target"], "qasm": []}[args.circuit]
+            config = {key: getattr(args, key) for key in ["circuit", *circuit_options, "noise", "noise_type",
+                                                          *noise.CHANNELS, "output", "precision", "shots",
+                                                          "seed"]
+                      if getattr(args, key) is not None}
+            if args.circuit == "qasm":
+                with open(args.qasm_file) as file:
+                    config["qasm"] = file.read()
+            emit(simulation.run(config, use_cache=args.cache))
+        elif args.command == "batch":
+            for result in workers.stream(simulation.run_or_error, read_configs(args.path)):
+                emit(result)
+        elif args.command == "replay":
+            rows = []
+            for row in session.replay(args.path, args.engine):
+                rows.append(row)
+                emit(row)
+            print(session.summary_text(rows), file=sys.stderr)
+            if any(row["status"] == "mismatch" for row in rows):
+                return 1
+        else:
+            configs = sweep.configurations(sweep.parse_range(args.qubits, integer=True), sweep.parse_range(args.noise),
+                                           args.hadamard, args.cnot, args.pauli_x, args.shots, args.seed,
+                                           args.noise_type)
+            for row in workers.stream(sweep.run_configuration, configs):
+                emit(row)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    finally:
+        workers.shutdown()
+        if args.trace:
+            tracing.export(args.trace)
+            print(tracing.summary_text(), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
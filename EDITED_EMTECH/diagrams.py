@@ -0,0 +1,148 @@
+from collections import OrderedDict
+import base64
+import io
+import threading
+import tkinter as tk
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import cache
+import tracing
+import workers
+
+MAX_INSTRUCTIONS = 64  # Instructions drawn before "Show more" is offered
+DPI = 80
+INCHES_PER_UNIT = 0.8361111  # Size of one layout unit of Qiskit's mpl drawer
+FOLD = 25  # Layers per row before the mpl drawer wraps the diagram
+MAX_CACHED = 64  # Diagrams (PNG bytes or text) kept in memory, least recently used dropped first
+
+# Diagrams have their own small LRU so they neither count towards nor evict the simulation results
+_cached = OrderedDict()
+_lock = threading.Lock()
+
+
+# Functions to look diagrams up and store them
+def cached(key):
+    """Returns the cached diagram for key, or None."""
+    with _lock:
+        if key in _cached:
+            _cached.move_to_end(key)
+            return _cached[key]
+    return None
+
+
+def remember(key, diagram):
+    """Stores a diagram, dropping the least recently used one past MAX_CACHED."""
+    with _lock:
+        _cached[key] = diagram
+        _cached.move_to_end(key)
+        while len(_cached) > MAX_CACHED:
+            _cached.popitem(last=False)
+
+
+# Function to cut a circuit down to its first instructions
+def truncated(qc, max_instructions=MAX_INSTRUCTIONS):
+    """Returns (circuit with at most max_instructions instructions, number of instructions left out)."""
+    hidden = len(qc.data) - max_instructions
+    if hidden <= 0:
+        return qc, 0
+    part = qc.copy_empty_like()
+    for instruction in qc.data[:max_instructions]:
+        part.append(instruction)
+    return part, hidden
+
+
+# Function to draw a circuit diagram into PNG bytes (safe to call on a worker thread)
+@tracing.traced()
+def render_png(qc, dpi=DPI):
+    """Draws qc with Qiskit's mpl drawer on a standalone Agg figure and returns the PNG bytes."""
+    # Size the figure like the drawer would on its own (about one unit per layer and wire,
+    # wrapped every FOLD layers) without going through pyplot, which must stay on the Tk thread
+    layers = max(1, qc.depth())
+    wires = qc.num_qubits + (1 if qc.num_clbits else 0)
+    rows = -(-layers // FOLD)
+    figure = Figure(figsize=(INCHES_PER_UNIT * (min(layers, FOLD) + 3.44),
+                             INCHES_PER_UNIT * (rows * (wires + 1) - 0.6)))
+    FigureCanvasAgg(figure)
+    qc.draw(output="mpl", ax=figure.add_subplot(1, 1, 1), fold=FOLD)
+    buffer = io.BytesIO()
+    figure.savefig(buffer, format="png", dpi=dpi, bbox_inches="tight")
+    return buffer.getvalue()
+
+
+# Function to get a text diagram through the cache (safe to call on a worker thread)
+@tracing.traced()
+def text_diagram(qc, max_instructions=MAX_INSTRUCTIONS):
+    """Returns the text drawing of qc, truncated to max_instructions, from the cache when possible."""
+    part, hidden = truncated(qc, max_instructions)
+    key = cache.circuit_key(part, kind="text-diagram")
+    text = cached(key)
+    if text is None:
+        text = str(part.draw(output="text"))
+        remember(key, text)
+    if hidden:
+        text += f"\n... {hidden} more instructions not shown"
+    return text
+
+
+class DiagramView:
+    """Circuit diagram shown as a cached PNG in a Tk label.
+
+    Diagrams are keyed on circuit structure in the diagram cache, so a circuit
+    drawn before appears at once. Others are drawn on a worker thread; large
+    circuits are cut to MAX_INSTRUCTIONS with a "Show more" button.
+    """
+
+    def __init__(self, master, on_change=None):
+        self.widget = tk.Frame(master, bg="#edf2f4")
+        self.label = tk.Label(self.widget, bg="#edf2f4", font=("Helvetica", 10))
+        self.label.pack()
+        self.more_button = tk.Button(self.widget, text="Show more", command=self.show_more,
+                                     font=("Helvetica", 10), relief="flat")
+        self.runner = workers.SimulationRunner(self.widget)
+        self.on_change = on_change  # Called after the diagram changes size, e.g. to update a scroll region
+        self.image = None  # Keeps the PhotoImage alive while it is displayed
+        self.qc = None
+        self.limit = MAX_INSTRUCTIONS
+
+    def update(self, qc):
+        """Shows the diagram for a new circuit."""
+        self.qc = qc
+        self.limit = MAX_INSTRUCTIONS
+        self._show()
+
+    def show_more(self):
+        """Doubles the number of instructions drawn."""
+        self.limit *= 2
+        self._show()
+
+    def _show(self):
+        part, hidden = truncated(self.qc, self.limit)
+        key = cache.circuit_key(part, kind="diagram", dpi=DPI)
+        png = cached(key)
+        if png is not None:
+            self.runner.cancel()  # A cached diagram supersedes one still being drawn
+            self._display(png, hidden)
+            return
+
+        def store(png):
+            remember(key, png)
+            self._display(png, hidden)
+
+        self.label.config(text="Drawing circuit...")
+        self.runner.submit(render_png, part, on_done=store, on_error=self._show_error)
+
+    @tracing.traced()
+    def _display(self, png, hidden):
+        self.image = tk.PhotoImage(data=base64.b64encode(png).decode("ascii"))
+        self.label.config(image=self.image, text="")
+        if hidden:
+            self.more_button.config(text=f"Show more ({hidden} instructions not shown)")
+            self.more_button.pack(pady=5)
+        else:
+            self.more_button.pack_forget()
+        if self.on_change is not None:
+            self.on_change()
+
+    def _show_error(self, error):
+        self.image = None
+        self.label.config(image="", text=f"Could not draw the circuit: {error}")
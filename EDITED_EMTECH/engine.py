@@ -0,0 +1,489 @@
+from collections import Counter
+import numpy as np
+import sampling
+import stabilizer
+import tracing
+
+# Single-qubit gate matrices supported natively by the NumPy engine
+_SQRT_HALF = 1 / np.sqrt(2)
+GATE_MATRICES = {
+    "h": np.array([[1, 1], [1, -1]], dtype=complex) * _SQRT_HALF,
+    "x": np.array([[0, 1], [1, 0]], dtype=complex),
+    "y": np.array([[0, -1j], [1j, 0]], dtype=complex),
+    "z": np.array([[1, 0], [0, -1]], dtype=complex),
+    "s": np.diag([1, 1j]),
+    "sdg": np.diag([1, -1j]),
+    "t": np.diag([1, np.exp(1j * np.pi / 4)]),
+    "tdg": np.diag([1, np.exp(-1j * np.pi / 4)]),
+    "id": np.eye(2, dtype=complex),
+}
+
+# Single-qubit rotations, built from their angle by gate_matrix()
+ROTATION_GATES = {"rx", "ry", "rz"}
+
+# Instructions the NumPy engine can skip without changing the result
+IGNORED_INSTRUCTIONS = {"barrier", "save_statevector"}
+
+
+# Function to create the |0...0> statevector
+def zero_state(num_qubits, dtype=complex, out=None):
+    """Returns the all-zero statevector, written into out (e.g. a shared-memory array) when given."""
+    state = np.zeros(2 ** num_qubits, dtype=dtype) if out is None else out
+    if out is not None:
+        state[:] = 0
+    state[0] = 1
+    return state
+
+
+# Function to apply a single-qubit gate in place
+def apply_single_qubit_gate(state, num_qubits, matrix, qubit):
+    """Applies a 2x2 matrix to one qubit of the statevector in place."""
+    matrix = matrix.astype(state.dtype, copy=False)  # complex64 states stay complex64 (no wide temporaries)
+    # Qiskit ordering: qubit 0 is the least significant bit of the index
+    view = state.reshape(2 ** (num_qubits - qubit - 1), 2, 2 ** qubit)
+    amp0, amp1 = view[:, 0, :], view[:, 1, :]
+
+    if matrix[0, 1] == 0 and matrix[1, 0] == 0:
+        # Diagonal gates (Z, S, T, RZ) only rescale amplitudes
+        if matrix[0, 0] != 1:
+            amp0 *= matrix[0, 0]
+        if matrix[1, 1] != 1:
+            amp1 *= matrix[1, 1]
+    elif matrix[0, 0] == 0 and matrix[1, 1] == 0:
+        # Anti-diagonal gates (X, Y) swap amplitudes
+        old0 = amp0.copy()
+        amp0[...] = amp1
+        amp1[...] = old0
+        if matrix[0, 1] != 1:
+            amp0 *= matrix[0, 1]
+        if matrix[1, 0] != 1:
+            amp1 *= matrix[1, 0]
+    else:
+        old0 = amp0.copy()
+        amp0 *= matrix[0, 0]
+        amp0 += matrix[0, 1] * amp1
+        amp1 *= matrix[1, 1]
+        old0 *= matrix[1, 0]
+        amp1 += old0
+    return state
+
+
+# Function to apply a CNOT gate in place
+def apply_cx(state, num_qubits, control, target):
+    """Swaps the target amplitudes wherever the control qubit is 1."""
+    high, low = max(control, target), min(control, target)
+    view = state.reshape(2 ** (num_qubits - high - 1), 2, 2 ** (high - low - 1), 2, 2 ** low)
+    control_axis, target_axis = (1, 3) if control > target else (3, 1)
+
+    index0 = [slice(None)] * 5
+    index0[control_axis] = 1
+    index0[target_axis] = 0
+    index1 = list(index0)
+    index1[target_axis] = 1
+
+    amp0 = view[tuple(index0)].copy()
+    view[tuple(index0)] = view[tuple(index1)]
+    view[tuple(index1)] = amp0
+    return state
+
+
+# Function to get the matrix of a single-qubit gate
+def gate_matrix(name, params=()):
+    """Returns the 2x2 matrix of a GATE_MATRICES gate or of rx/ry/rz(angle), in Qiskit's convention."""
+    if name not in ROTATION_GATES:
+        return GATE_MATRICES[name]
+    half = float(params[0]) / 2
+    c, s = np.cos(half), np.sin(half)
+    if name == "rx":
+        return np.array([[c, -1j * s], [-1j * s, c]])
+    if name == "ry":
+        return np.array([[c, -s], [s, c]], dtype=complex)
+    return np.diag([np.exp(-1j * half), np.exp(1j * half)])
+
+
+# Function to apply a gate by name
+def apply_gate(state, num_qubits, name, qubits, params=()):
+    """Applies a named gate from the supported gate set to the statevector in place."""
+    if name == "cx":
+        return apply_cx(state, num_qubits, qubits[0], qubits[1])
+    return apply_single_qubit_gate(state, num_qubits, gate_matrix(name, params), qubits[0])
+
+
+# Function to turn a circuit into a flat list of operations
+def circuit_operations(qc):
+    """Returns (name, qubit indices, clbit indices) for every instruction of a circuit."""
+    operations = []
+    for instruction in qc.data:
+        qubits = [qc.find_bit(qubit).index for qubit in instruction.qubits]
+        clbits = [qc.find_bit(clbit).index for clbit in instruction.clbits]
+        operations.append((instruction.operation.name, qubits, clbits))
+    return operations
+
+
+# Function to compute measurement probabilities
+def probabilities(state):
+    """Returns the normalized basis-state probabilities of a statevector."""
+    probs = np.abs(state) ** 2
+    return probs / probs.sum()
+
+
+# Function to convert a probability vector into a probabilities dictionary
+def probabilities_dict(state, num_qubits, threshold=1e-12):
+    """Returns the non-zero probabilities keyed by bitstring, like Statevector.probabilities_dict()."""
+    probs = probabilities(state)
+    indices = np.flatnonzero(probs > threshold)
+    return {format(int(i), f"0{num_qubits}b"): float(probs[i]) for i in indices}
+
+
+# Function to compute the Bloch vector of every qubit
+def bloch_vectors(state, num_qubits):
+    """Returns a (num_qubits, 3) array of single-qubit Bloch vectors (x, y, z)."""
+    vectors = np.zeros((num_qubits, 3))
+    for qubit in range(num_qubits):
+        view = state.reshape(2 ** (num_qubits - qubit - 1), 2, 2 ** qubit)
+        amp0, amp1 = view[:, 0, :], view[:, 1, :]
+        coherence = np.vdot(amp1, amp0)  # <0|rho|1> of the reduced state
+        vectors[qubit] = (2 * coherence.real, -2 * coherence.imag,
+                          np.vdot(amp0, amp0).real - np.vdot(amp1, amp1).real)
+    return vectors
+
+
+# Function to find how a single-qubit gate turns the Bloch sphere
+def bloch_rotation(matrix):
+    """Returns (unit axis, angle in [0, pi]) of the Bloch-sphere rotation performed by a 2x2 unitary."""
+    # Remove the global phase: U = cos(angle/2) I - i sin(angle/2) (axis . Pauli vector)
+    special = matrix / np.sqrt(np.linalg.det(matrix))
+    a, b = special[0, 0], special[0, 1]
+    if a.real < 0:
+        a, b = -a, -b  # U and -U are the same rotation; keep the shorter way round
+    angle = 2 * np.arccos(np.clip(a.real, -1, 1))
+    half_sine = np.sin(angle / 2)
+    if half_sine < 1e-12:
+        return np.array([0.0, 0.0, 1.0]), 0.0
+    axis = np.array([-b.imag, -b.real, -a.imag]) / half_sine
+    return axis / np.linalg.norm(axis), float(angle)
+
+
+# Function to check a circuit against an engine's gate set
+def supports_gate_set(qc, gate_names=None):
+    """Checks that every gate is in gate_names (any gate if None) and all measurements are terminal."""
+    if len(qc.cregs) > 1:
+        return False
+    measured = set()
+    for name, qubits, _ in circuit_operations(qc):
+        if name in IGNORED_INSTRUCTIONS:
+            continue
+        if name == "measure":
+            measured.update(qubits)
+        elif gate_names is None or name in gate_names:
+            if measured.intersection(qubits):
+                return False  # Gate after a measurement
+        else:
+            return False
+    return True
+
+
+# Function to check that a circuit's output distribution is fixed by its final statevector
+def samples_analytically(qc):
+    """True when every instruction before the terminal measurements is a unitary gate.
+
+    Resets, initialize and classically controlled operations make each shot
+    a different trajectory, so such circuits must be run shot by shot.
+    """
+    from qiskit.circuit import Gate
+    if not supports_gate_set(qc):
+        return False
+    for instruction in qc.data:
+        operation = instruction.operation
+        if operation.name in IGNORED_INSTRUCTIONS or operation.name == "measure":
+            continue
+        if not isinstance(operation, Gate) or getattr(operation, "condition", None) is not None:
+            return False
+    return True
+
+
+# Function to format rows of classical bits as bitstrings
+def bits_to_keys(bits):
+    """Converts a (rows, num_clbits) bool array into Qiskit-style bitstrings."""
+    # Qiskit prints clbit 0 as the rightmost character
+    if bits.shape[1] == 0:
+        return [""] * len(bits)
+    characters = np.ascontiguousarray((bits[:, ::-1] + ord("0")).astype(np.uint8))
+    return characters.view(f"S{bits.shape[1]}").ravel().astype(str).tolist()
+
+
+# Function to count rows of classical bits
+def counts_from_bits(bits):
+    """Counts the rows of a (shots, num_clbits) bool array as Qiskit-style bitstrings."""
+    width = bits.shape[1]
+    # Pack each row into bytes; np.unique on one integer (or byte string) per row is far
+    # faster than np.unique(bits, axis=0), which compares the rows column by column
+    packed = np.packbits(bits, axis=1, bitorder="little")
+    if width <= 64:
+        padded = np.zeros((len(bits), 8), dtype=np.uint8)
+        padded[:, :packed.shape[1]] = packed
+        values, occurrences = np.unique(padded.view("<u8").ravel(), return_counts=True)
+        rows = values.astype("<u8").view(np.uint8).reshape(-1, 8)
+    else:
+        values, occurrences = np.unique(packed.view(np.dtype((np.void, packed.shape[1]))).ravel(),
+                                        return_counts=True)
+        rows = values.view(np.uint8).reshape(-1, packed.shape[1])
+    rows = np.unpackbits(rows, axis=1, count=width, bitorder="little").astype(bool)
+    return dict(zip(bits_to_keys(rows), occurrences.tolist()))
+
+
+class NumpyEngine:
+    """Lightweight dense statevector engine for the H/X/Y/Z/S/T/RX/RY/RZ/CX gate set."""
+
+    name = "numpy"
+    statevector = True
+    executor = "process"  # Pure NumPy/Python: a process pool avoids contending for the GIL
+    gates = set(GATE_MATRICES) | ROTATION_GATES | {"cx"}
+
+    def supports(self, qc):
+        """Checks that every gate is supported and all measurements are terminal."""
+        return supports_gate_set(qc, self.gates)
+
+    def evolve(self, qc, dtype=complex, out=None):
+        """Returns the final statevector (evolved in place in out, if given) and the (qubit, clbit) measurement pairs."""
+        num_qubits = qc.num_qubits
+        state = zero_state(num_qubits, dtype, out)
+        measurements = []
+        for instruction, (name, qubits, clbits) in zip(qc.data, circuit_operations(qc)):
+            if name in IGNORED_INSTRUCTIONS:
+                continue
+            if name == "measure":
+                measurements.append((qubits[0], clbits[0]))
+            else:
+                apply_gate(state, num_qubits, name, qubits, instruction.operation.params)
+        return state, measurements
+
+    @tracing.traced()
+    def run_statevector(self, qc, dtype=complex, out=None):
+        """Returns the statevector of the circuit before any measurement (complex64 halves its memory)."""
+        state, _ = self.evolve(qc, dtype, out)
+        return state
+
+    @tracing.traced()
+    def sampler(self, qc, seed=None):
+        """Computes the output distribution once and returns a function that draws shots from it."""
+        state, measurements = self.evolve(qc)
+        values, probs = sampling.measurement_distribution(probabilities(state), measurements)
+        rng = np.random.default_rng(seed)
+        return lambda shots: sampling.sample_counts(values, probs, shots, qc.num_clbits, rng)
+
+    @tracing.traced()
+    def bit_sampler(self, qc, seed=None):
+        """Like sampler(), but the returned function gives a (shots, num_clbits) bool array, grouped by outcome."""
+        state, measurements = self.evolve(qc)
+        values, probs = sampling.measurement_distribution(probabilities(state), measurements)
+        rng = np.random.default_rng(seed)
+        return lambda shots: sampling.sample_bits(values, probs, shots, qc.num_clbits, rng)
+
+    @tracing.traced()
+    def run_counts(self, qc, shots, seed=None):
+        """Samples every shot from the output distribution."""
+        return self.sampler(qc, seed)(shots)
+
+
+class StabilizerEngine:
+    """Tableau engine for all-Clifford circuits; memory grows as n^2 instead of 2^n."""
+
+    name = "stabilizer"
+    statevector = False
+    executor = "process"
+    gates = set(stabilizer.CLIFFORD_GATES)
+
+    # Largest number of (outcome x qubit) bits enumerated for exact multinomial sampling
+    max_enumerated_bits = 2 ** 22
+    # Largest number of (shot x qubit) bits sampled per chunk
+    chunk_bits = 2 ** 24
+    # Largest number of equally likely outcomes drawn with one multinomial
+    max_multinomial_outcomes = 2 ** 24
+    # Largest outcome space whose outcomes are numbered by an int64 index
+    max_indexed_rank = 62
+
+    def supports(self, qc):
+        """Checks that the circuit only uses Clifford gates and terminal measurements."""
+        return supports_gate_set(qc, self.gates)
+
+    def evolve(self, qc):
+        """Returns the final tableau and the (qubit, clbit) measurement pairs."""
+        tableau = stabilizer.StabilizerTableau(qc.num_qubits)
+        measurements = []
+        for name, qubits, clbits in circuit_operations(qc):
+            if name in IGNORED_INSTRUCTIONS:
+                continue
+            if name == "measure":
+                measurements.append((qubits[0], clbits[0]))
+            else:
+                tableau.apply(name, qubits)
+        return tableau, measurements
+
+    @tracing.traced()
+    def sampler(self, qc, seed=None):
+        """Reduces the tableau once and returns a function that draws shots from it."""
+        tableau, measurements = self.evolve(qc)
+        rng = np.random.default_rng(seed)
+        offset, basis = tableau.support()
+        rank, num_qubits = basis.shape[0], qc.num_qubits
+        qubits = [qubit for qubit, _ in measurements]
+        clbits = [clbit for _, clbit in measurements]
+
+        def to_clbits(qubit_values):
+            values = np.zeros((qubit_values.shape[0], qc.num_clbits), dtype=bool)
+            values[:, clbits] = qubit_values[:, qubits]
+            return values
+
+        # Outcomes are uniform over an affine subspace of dimension rank
+        if (2 ** rank) * num_qubits <= self.max_enumerated_bits:
+            combinations = (np.arange(2 ** rank)[:, None] >> np.arange(rank)) & 1
+            outcomes = ((combinations @ basis.astype(np.int64)) % 2).astype(bool) ^ offset
+            # Several outcomes can share a key when not every qubit is measured
+            keys = bits_to_keys(to_clbits(outcomes))
+
+            def draw(shots):
+                counts = Counter()
+                occurrences = rng.multinomial(shots, np.full(2 ** rank, 0.5 ** rank))
+                for i in np.flatnonzero(occurrences):
+                    counts[keys[i]] += int(occurrences[i])
+                return dict(counts)
+            return draw
+
+        # Several outcomes can only share a key when some qubit is not measured
+        distinct_keys = len(set(qubits)) == num_qubits
+
+        def draw(shots):
+            if rank > self.max_indexed_rank:
+                counts = Counter()
+                chunk = max(1, self.chunk_bits // max(num_qubits, 1))
+                for start in range(0, shots, chunk):
+                    sample = tableau.sample(min(chunk, shots - start), rng, support=(offset, basis))
+                    counts.update(counts_from_bits(to_clbits(sample)))
+                return dict(counts)
+            # Number the outcomes 0 .. 2^rank - 1 and only build the ones that were drawn: one multinomial
+            # when the shots cover the space, else one uniform index per shot
+            if 2 ** rank <= min(shots, self.max_multinomial_outcomes):
+                occurrences = rng.multinomial(shots, np.full(2 ** rank, 0.5 ** rank))
+                indices = np.flatnonzero(occurrences)
+                occurrences = occurrences[indices]
+            else:
+                indices, occurrences = np.unique(rng.integers(2 ** rank, size=shots, dtype=np.int64),
+                                                 return_counts=True)
+            combinations = ((indices[:, None] >> np.arange(rank)) & 1).astype(np.float32)
+            outcomes = ((combinations @ basis.astype(np.float32)) % 2).astype(bool) ^ offset
+            keys = bits_to_keys(to_clbits(outcomes))
+            if distinct_keys:
+                return dict(zip(keys, occurrences.tolist()))
+            counts = Counter()
+            for key, occurrence in zip(keys, occurrences.tolist()):
+                counts[key] += occurrence
+            return dict(counts)
+        return draw
+
+    @tracing.traced()
+    def bit_sampler(self, qc, seed=None):
+        """Like sampler(), but the returned function gives a (shots, num_clbits) bool array."""
+        tableau, measurements = self.evolve(qc)
+        rng = np.random.default_rng(seed)
+        support = tableau.support()
+        qubits = [qubit for qubit, _ in measurements]
+        clbits = [clbit for _, clbit in measurements]
+
+        def draw(shots):
+            values = np.zeros((shots, qc.num_clbits), dtype=bool)
+            values[:, clbits] = tableau.sample(shots, rng, support=support)[:, qubits]
+            return values
+        return draw
+
+    @tracing.traced()
+    def run_counts(self, qc, shots, seed=None):
+        """Samples measurement counts straight from the tableau."""
+        return self.sampler(qc, seed)(shots)
+
+
+class AerEngine:
+    """Fallback engine that runs circuits on qiskit_aer's AerSimulator."""
+
+    name = "aer"
+    statevector = True
+    executor = "thread"  # Aer releases the GIL while it simulates
+
+    def __init__(self):
+        self._simulator = None
+
+    @property
+    def simulator(self):
+        """Creates the AerSimulator on first use so qiskit_aer is only imported when needed."""
+        if self._simulator is None:
+            from qiskit_aer import AerSimulator
+            self._simulator = AerSimulator()
+        return self._simulator
+
+    def supports(self, qc):
+        """Aer can run any circuit the pages build."""
+        return True
+
+    @tracing.traced()
+    def run_statevector(self, qc, dtype=complex, out=None):
+        """Runs the circuit without its final measurements and returns the statevector."""
+        simulator = self.simulator  # Importing qiskit_aer adds save_statevector()
+        qc = qc.remove_final_measurements(inplace=False)
+        qc.save_statevector()
+        with tracing.span("aer.execute"):
+            result = simulator.run(qc).result()
+        with tracing.span("aer.get_statevector"):
+            state = np.asarray(result.get_statevector())
+        if out is not None:
+            out[:] = state
+            return out
+        return state.astype(dtype, copy=False)
+
+    @tracing.traced()
+    def sampler(self, qc, seed=None):
+        """Returns a function that draws shots, sampling analytically when the circuit is unitary up to its
+        terminal measurements; anything else (resets, conditionals) runs shot by shot on Aer."""
+        rng = np.random.default_rng(seed)
+        if samples_analytically(qc):
+            measurements = [(qubits[0], clbits[0]) for name, qubits, clbits in circuit_operations(qc)
+                            if name == "measure"]
+            state = self.run_statevector(qc)
+            values, probs = sampling.measurement_distribution(probabilities(state), measurements)
+            return lambda shots: sampling.sample_counts(values, probs, shots, qc.num_clbits, rng)
+
+        def draw(shots):
+            seed_simulator = int(rng.integers(2 ** 31))
+            with tracing.span("aer.execute"):
+                result = self.simulator.run(qc, shots=shots, seed_simulator=seed_simulator).result()
+            with tracing.span("aer.get_counts"):
+                return result.get_counts()
+        return draw
+
+    @tracing.traced()
+    def run_counts(self, qc, shots, seed=None):
+        """Returns measurement counts for the circuit."""
+        return self.sampler(qc, seed)(shots)
+
+
+# Engines in order of preference; Aer handles anything the others cannot
+ENGINES = [StabilizerEngine(), NumpyEngine(), AerEngine()]
+
+
+# Function to pick the fastest engine for a circuit
+def select_engine(qc, statevector=False):
+    """Returns the first registered engine that supports the circuit (and can return a statevector if asked)."""
+    for engine in ENGINES:
+        if statevector and not engine.statevector:
+            continue
+        if engine.supports(qc):
+            return engine
+    raise ValueError(f"No simulation engine supports circuit '{qc.name}'.")
+
+
+# Function to look an engine up by name (used by worker processes)
+def get_engine(name):
+    """Returns the registered engine with the given name."""
+    for engine in ENGINES:
+        if engine.name == name:
+            return engine
+    raise ValueError(f"Unknown simulation engine '{name}'.")
@@ -1,14 +1,24 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
-from qiskit import QuantumCircuit
-from qiskit.visualization import plot_histogram
-from qiskit_aer import AerSimulator
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-import random
-import main
-
-def run_interference_circuit(): 
+from tkinter import ttk, messagebox, filedialog
+import numpy as np
+import diagrams
+import engine
+import noise
+import reduction
+import render
+import sampling
+import session
+import simulation
+import sweep
+import tracing
+import workers
+
+# Noise types offered on the page -> noise.CHANNELS
+NOISE_TYPES = {"Bit flip": "bit_flip", "Depolarizing": "depolarizing", "Readout": "readout"}
+
+# Function to build the interference page inside the main window (called once by main.py)
+def build_interference_page(master, show_menu):
+    """Builds the interference simulation page; show_menu() returns to the main menu."""
     # Function to run the simulation
     def run_simulation():
         try:
@@ -18,51 +28,136 @@ def run_interference_circuit():
             apply_hadamard = hadamard_var.get()  # Get the state of the Hadamard checkbox
             apply_cnot = cnot_var.get()  # Get the state of the CNOT checkbox
             noise_level = noise_slider.get()  # Get the noise level from the slider
-
-            # Create the quantum circuit
-            qc = QuantumCircuit(num_qubits, num_qubits)
-
-            # Apply Hadamard gate to all qubits if selected
-            if apply_hadamard:
-                qc.h(range(num_qubits))
-
-            if apply_pauli_x:
-                qc.x(range(num_qubits))
-
-            # Apply the CNOT gates if selected
-            if apply_cnot:
-                for i in range(num_qubits - 1):
-                    qc.cx(i, i + 1)
-
-            # Simulate noise by randomly flipping qubits based on noise level
-            if noise_level > 0:
-                for qubit in range(num_qubits):
-                    if random.random() < noise_level:
-                        qc.x(qubit)  # Apply X gate (flip) as noise
-
-            # Measure the qubits
-            qc.measure(range(num_qubits), range(num_qubits))
-
-            # Display the quantum circuit in text form
-            qc_text.delete(1.0, tk.END)
-            qc_text.insert(tk.END, qc.draw())
-
-            # Set up the simulator
-            sim = AerSimulator()
-            result = sim.run(qc, shots=num_shots).result()
-            counts = result.get_counts()
-
-            # Update the result with counts
-            result_label.config(text="Measurement Results (Counts):\n" + str(counts))
-
-            # Plot the results
-            ax.clear()
-            plot_histogram(counts, ax=ax)
-            canvas.draw()
+            noise_model = noise.NoiseModel(**{NOISE_TYPES[noise_type_box.get()]: noise_level})
+            stream_shots = stream_var.get()  # Get the state of the streaming checkbox
+            tolerance = float(tolerance_entry.get() or 0)  # Early-stopping tolerance (0 runs every shot)
+
+            # Create the noiseless circuit; every shot gets its own errors when it is sampled (see noise.sampler)
+            qc = simulation.interference_circuit(num_qubits, apply_hadamard, apply_cnot, apply_pauli_x)
+
+            # Display the quantum circuit in text form, drawn on a worker thread (cached by structure,
+            # long circuits truncated); it has its own runner so it does not cancel the simulation
+            diagram_runner.submit(diagrams.text_diagram, qc, on_done=show_diagram, on_error=show_run_error)
+
+            # Set up the simulator; a new run supersedes any run or stream still in progress
+            sim = engine.select_engine(qc)
+            seed = session.new_seed()  # Recorded sessions are seeded so they can be replayed exactly
+            if stream_shots:
+                # The sampler is prepared in a worker thread and stays in this process for the stream
+                on_finished = session.recorder("interference", qc, "counts", sim.name, lambda counts: None,
+                                               num_shots, seed, noise=noise_model.key(), stream=True,
+                                               tolerance=tolerance)
+                runner.submit(noise.sampler, qc, noise_model, seed, sim.name,
+                              on_done=lambda draw: start_streaming(draw, num_shots, tolerance, on_finished),
+                              on_error=show_run_error)
+            else:
+                # The output distribution is computed once and all shots are drawn from it in one call.
+                # The cache key is the one simulation.sample uses, so the page and the CLI share entries
+                # (unseeded runs have no key: they must draw new shots every time)
+                on_done = session.recorder("interference", qc, "counts", sim.name, show_counts, num_shots, seed,
+                                           noise=noise_model.key())
+                runner.submit_cached(simulation.counts_key(qc, num_shots, seed, noise_model), sim,
+                                     workers.run_counts, qc, num_shots, seed, noise_model,
+                                     on_done=on_done, on_error=show_run_error)
 
         except ValueError:
             messagebox.showerror("Input Error", "Please enter valid numbers for qubits and shots.")
 
+    # Function to show the text diagram of the circuit
+    def show_diagram(text):
+        qc_text.delete(1.0, tk.END)
+        qc_text.insert(tk.END, text)
+        refresh_layout()
+
+    # Function to let Tk place and redraw the results now
+    def refresh_layout():
+        with tracing.span("interference.tk_layout"):
+            visualization_frame.update_idletasks()
+
+    # Function to show counts in the result label and histogram
+    @tracing.traced("interference.show_counts")
+    def show_counts(counts, progress=""):
+        # Update the result with counts
+        result_label.config(text="Measurement Results (Counts):" + progress + "\n" + reduction.counts_text(counts))
+
+        # Plot the results; the bars are reused while the outcomes stay the same
+        heatmap_view.widget.grid_remove()
+        histogram_view.widget.grid()
+        histogram_view.update(counts)
+        refresh_layout()
+
+    # Function to run every (qubits, noise) configuration of a sweep as one batched job
+    def run_sweep_simulation():
+        try:
+            qubit_values = sweep.parse_range(sweep_qubits_entry.get(), integer=True)
+            noise_values = sweep.parse_range(sweep_noise_entry.get())
+            num_shots = int(shots_entry.get())
+        except ValueError:
+            messagebox.showerror("Input Error", "Please enter ranges like 2-5 for qubits and 0-1:11 for noise, and a valid number of shots.")
+            return
+        configs = sweep.configurations(qubit_values, noise_values, hadamard_var.get(), cnot_var.get(),
+                                       pauli_x_var.get(), num_shots, noise_type=NOISE_TYPES[noise_type_box.get()])
+        result_label.config(text=f"Running sweep of {len(configs)} configurations...")
+        # The configurations are split across the worker processes; a thread waits for all of them
+        runner.submit_cancellable(sweep.run_sweep, configs, on_done=show_sweep, on_error=show_run_error)
+
+    # Function to show sweep results as a qubits x noise heatmap
+    @tracing.traced("interference.show_sweep")
+    def show_sweep(rows):
+        sweep_rows[:] = rows
+        qubit_values, noise_values, fidelity = sweep.grid(rows)
+        result_label.config(text=f"Sweep Results: {len(rows)} configurations, mean fidelity {fidelity[~np.isnan(fidelity)].mean():.3f}")
+        histogram_view.widget.grid_remove()
+        heatmap_view.widget.grid()
+        heatmap_view.update(fidelity, qubit_values, [f"{noise:.2f}" for noise in noise_values],
+                            "Qubits", "Noise level", "Fidelity to noiseless run")
+        refresh_layout()
+
+    # Function to save the last sweep to CSV or Parquet
+    def export_sweep():
+        if not sweep_rows:
+            messagebox.showinfo("Export Sweep", "Run a sweep first.")
+            return
+        path = filedialog.asksaveasfilename(defaultextension=".csv",
+                                            filetypes=[("CSV", "*.csv"), ("Parquet", "*.parquet")])
+        if not path:
+            return
+        try:
+            sweep.export_rows(sweep_rows, path)
+        except ImportError:
+            messagebox.showerror("Export Error", "Parquet export needs the pyarrow package; save as .csv instead.")
+        except OSError as e:
+            messagebox.showerror("Export Error", str(e))
+
+    # Function to report a simulation that failed in the worker
+    def show_run_error(error):
+        messagebox.showerror("Simulation Error", str(error))
+
+    # Function to run the shots in chunks, redrawing after each one
+    def start_streaming(draw, num_shots, tolerance, on_finished):
+        chunks = sampling.stream_counts(draw, num_shots, tolerance=tolerance)
+        last = {}
+
+        def show_chunk(chunk):
+            if chunk is None:
+                on_finished(last)  # Every shot has run or the tolerance was reached
+                return
+            counts, shots_done, error = chunk
+            last.clear()
+            last.update(counts)
+            stopped_early = tolerance > 0 and shots_done < num_shots and error <= tolerance
+            progress = f" {shots_done}/{num_shots} shots, max std. error {error:.4f}"
+            if stopped_early:
+                progress += " (tolerance reached)"
+            show_counts(dict(counts), progress)
+            next_chunk()
+
+        # Each chunk is drawn in a worker thread so the window keeps responding
+        def next_chunk():
+            runner.submit(next, chunks, None, on_done=show_chunk, on_error=show_run_error)
+
+        next_chunk()
+
     # Function to update the noise level label
     def update_noise_label(val):
         try:
@@ -72,14 +167,11 @@ def run_interference_circuit():
         except ValueError:
             noise_label.config(text="Noise Level: Invalid")
 
-    # Create a new Tkinter window for the interference simulation
-    root = tk.Toplevel()
-    root.title("Quantum Interference Simulation")
-    root.configure(bg="#2b2d42")  # Dark modern background
-
-    # Full screen window setup
-    root.attributes("-fullscreen", True)  # Set the window to fullscreen
-    root.bind("<Escape>", lambda event: root.attributes("-fullscreen", False))  # Escape to exit fullscreen
+    # Create the page frame for the interference simulation
+    root = tk.Frame(master, bg="#2b2d42")  # Dark modern background
+    runner = workers.SimulationRunner(root)
+    diagram_runner = workers.SimulationRunner(root)
+    sweep_rows = []  # Rows of the last parameter sweep, kept for export
 
     # Frame for the controls and simulation results
     content_frame = tk.Frame(root, bd=2, relief="sunken", padx=10, pady=10, bg="#edf2f4")
@@ -125,6 +217,14 @@ def run_interference_circuit():
     noise_slider.set(0)  # Default noise level is 0
     noise_slider.grid(row=5,column=1, padx=10, pady=10)
 
+    # Noise type: which per-shot error the noise level sets (see noise.NoiseModel)
+    noise_type_label = tk.Label(controls_frame, text="Noise Type:", **label_style)
+    noise_type_label.grid(row=6, column=0, padx=10, pady=10, sticky="e")
+
+    noise_type_box = ttk.Combobox(controls_frame, values=list(NOISE_TYPES), state="readonly", font=("Helvetica", 12))
+    noise_type_box.set("Bit flip")
+    noise_type_box.grid(row=6, column=1, padx=10, pady=10)
+
     button_style = {
         "font": ("Helvetica", 12),
         "bg": "#ef233c",
@@ -135,16 +235,53 @@ def run_interference_circuit():
         "width": 20
     }
 
+    # Streaming mode: run shots in chunks and stop once the histogram is within tolerance
+    stream_var = tk.BooleanVar(value=False)  # Default to False (all shots at once)
+    stream_check = tk.Checkbutton(controls_frame, text="Stream Shots (live histogram)", variable=stream_var, **checkbox_style)
+    stream_check.grid(row=7, column=0, columnspan=2, pady=10)
+
+    tolerance_label = tk.Label(controls_frame, text="Stop at Std. Error:", **label_style)
+    tolerance_label.grid(row=8, column=0, padx=10, pady=10, sticky="e")
+
+    tolerance_entry = tk.Entry(controls_frame, font=("Helvetica", 12))
+    tolerance_entry.insert(0, "0.001")
+    tolerance_entry.grid(row=8, column=1, padx=10, pady=10)
+
     run_button = tk.Button(controls_frame, text="Run Simulation", command=run_simulation, **button_style)
-    run_button.grid(row=6,column=0, columnspan=2, pady=10)
+    run_button.grid(row=9,column=0, columnspan=2, pady=10)
+
+    # Cancels the running simulation or stream
+    cancel_button = tk.Button(controls_frame, text="Cancel", command=runner.cancel, **button_style)
+    cancel_button.grid(row=10, column=0, columnspan=2, pady=10)
+
+    # Sweep mode: every qubit count and noise level in the given ranges, with the gates selected above
+    sweep_qubits_label = tk.Label(controls_frame, text="Sweep Qubits:", **label_style)
+    sweep_qubits_label.grid(row=11, column=0, padx=10, pady=10, sticky="e")
+
+    sweep_qubits_entry = tk.Entry(controls_frame, font=("Helvetica", 12))
+    sweep_qubits_entry.insert(0, "2-5")
+    sweep_qubits_entry.grid(row=11, column=1, padx=10, pady=10)
+
+    sweep_noise_label = tk.Label(controls_frame, text="Sweep Noise (from-to:steps):", **label_style)
+    sweep_noise_label.grid(row=12, column=0, padx=10, pady=10, sticky="e")
+
+    sweep_noise_entry = tk.Entry(controls_frame, font=("Helvetica", 12))
+    sweep_noise_entry.insert(0, "0-1:11")
+    sweep_noise_entry.grid(row=12, column=1, padx=10, pady=10)
+
+    sweep_button = tk.Button(controls_frame, text="Run Sweep", command=run_sweep_simulation, **button_style)
+    sweep_button.grid(row=13, column=0, columnspan=2, pady=10)
+
+    export_button = tk.Button(controls_frame, text="Export Sweep", command=export_sweep, **button_style)
+    export_button.grid(row=14, column=0, columnspan=2, pady=10)
 
     def return_to_main_menu():
         """Returns to the main menu."""
-        root.destroy()  # Close the current window
-        main.Application().mainloop()  # Reopen the main menu
+        runner.cancel()
+        show_menu()  # The page stays built, so coming back is instant
 
     button_close = tk.Button(controls_frame, text="Return to Main Menu", command=return_to_main_menu, **button_style)
-    button_close.grid(row=7,column=0, columnspan=2, pady=10)
+    button_close.grid(row=15,column=0, columnspan=2, pady=10)
 
     # Frame for the visualizations (Quantum Circuit, Results, Histogram)
     visualization_frame = tk.Frame(content_frame, bd=2, relief="sunken", padx=10, pady=10, bg="#edf2f4")
@@ -161,9 +298,12 @@ def run_interference_circuit():
     result_label.grid(row=2, column=0, columnspan=2, padx=10, pady=10)
 
     # Set up the plot for the histogram (smaller size)
-    fig, ax = plt.subplots(figsize=(4, 3))  # Reduced the figure size
-    canvas = FigureCanvasTkAgg(fig, visualization_frame)
-    canvas.get_tk_widget().grid(row=3, column=0, columnspan=2)
+    histogram_view = render.HistogramView(visualization_frame, figsize=(4, 3))  # Reduced the figure size
+    histogram_view.widget.grid(row=3, column=0, columnspan=2)
+
+    # Heatmap for sweep results; it takes the histogram's place while a sweep is shown
+    heatmap_view = render.HeatmapView(visualization_frame, figsize=(4, 3))
+    heatmap_view.widget.grid(row=3, column=0, columnspan=2)
+    heatmap_view.widget.grid_remove()
 
-    # Run the tkinter main loop
-    root.mainloop()
+    return root
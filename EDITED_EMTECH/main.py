@@ -1,27 +1,133 @@
+import time
+STARTUP_START = time.perf_counter()  # Taken before any other import so startup time covers them
+
+import importlib
+import os
+import sys
+import threading
 import tkinter as tk
 from tkinter import ttk
 from tkinter import font
-import sqb_h 
-import mqb_h
-import interference 
+import tracing
+
+# The pages pull in qiskit and matplotlib, so they are imported on first use
+# (or prewarmed in the background once the menu is idle) instead of here.
+# Page module -> (function that builds the page frame, window title)
+PAGES = {
+    "sqb_h": ("build_sqb_page", "Quantum Circuit Simulator"),
+    "mqb_h": ("build_mqb_page", "Multi-Qubit Superposition"),
+    "interference": ("build_interference_page", "Quantum Interference Simulation"),
+}
+MENU_TITLE = "Quantum Simulation Main Page"
+PREWARM_DELAY_MS = 200  # Give the menu time to draw before prewarming
+STARTUP_TARGET_MS = 300  # Menu must be visible within this time
+
+# Run "python main.py --startup-check" to open the menu, report the time and exit
+STARTUP_CHECK = "--startup-check" in sys.argv
+
+# Set QSIM_TRACE=trace.json to trace every stage from startup and save a Chrome trace on exit
+# (QSIM_TRACE_MEMORY=1 also records peak memory per stage); F12 shows the timings in the window
+TRACE_PATH = os.environ.get("QSIM_TRACE")
+
+# Set QSIM_SESSION=session.qsl to log every simulation run (circuit, seed, timing and result digest);
+# "python cli.py replay session.qsl" reruns and verifies the session headlessly
+SESSION_PATH = os.environ.get("QSIM_SESSION")
 
 class Application(tk.Tk):
     def __init__(self):
+        # Tracing and session recording start with the window, not on import, so process-pool workers
+        # that re-import this module (spawn start method) never reopen or truncate the log
+        if TRACE_PATH:
+            tracing.enable(memory=os.environ.get("QSIM_TRACE_MEMORY") == "1")
+        if SESSION_PATH:
+            import session  # Pulls in NumPy and the engines, so only when recording
+            session.start(SESSION_PATH)
+
         super().__init__()
 
         # Set window title
-        self.title("Quantum Simulation Main Page")
+        self.title(MENU_TITLE)
         
         # Enable fullscreen mode on startup
         self.attributes("-fullscreen", True)
         
         # Configure a modern style
         self.configure(bg="#2b2d42")  # Dark modern background
+
+        # One root window: the menu and every page are frames that are swapped in and out.
+        # Pages are built on first visit and kept, along with their simulators and figures.
+        self.menu_frame = tk.Frame(self, bg="#2b2d42")
+        self.pages = {}
+        self.current_frame = None
         self.create_buttons()
+        self.show_menu()
 
         # Bind the Escape key to exit fullscreen
         self.bind("<Escape>", self.toggle_fullscreen)
 
+        # Bind F12 to the performance overlay (built on first use)
+        self.overlay = None
+        self.bind("<F12>", self.toggle_overlay)
+
+        # Measure startup once the menu has been drawn
+        self.startup_ms = None
+        self.after_idle(self.on_menu_visible)
+
+    def on_menu_visible(self):
+        """Reports how long the menu took to appear, then prewarms the pages."""
+        self.update_idletasks()  # Make sure the menu is drawn before stopping the clock
+        self.startup_ms = (time.perf_counter() - STARTUP_START) * 1000
+        status = "OK" if self.startup_ms <= STARTUP_TARGET_MS else "SLOW"
+        if STARTUP_CHECK or TRACE_PATH:  # Timing reports only when asked for
+            print(f"Main menu visible after {self.startup_ms:.0f} ms (target {STARTUP_TARGET_MS} ms): {status}")
+        if STARTUP_CHECK:
+            self.destroy()
+            return
+        self.after(PREWARM_DELAY_MS, self.prewarm_pages)
+
+    def prewarm_pages(self):
+        """Imports the page modules in a background thread while the menu is idle."""
+        def prewarm():
+            for name in PAGES:
+                importlib.import_module(name)
+        threading.Thread(target=prewarm, name="prewarm", daemon=True).start()
+
+    def load_page(self, name):
+        """Returns a page module, importing it now if prewarming has not finished yet."""
+        if name not in sys.modules:
+            self.config(cursor="watch")  # Show a busy cursor while the page loads
+            self.update_idletasks()
+        module = importlib.import_module(name)
+        self.config(cursor="")
+        return module
+
+    def show_frame(self, frame, title):
+        """Replaces the visible frame with another one."""
+        if self.current_frame is not None:
+            self.current_frame.pack_forget()
+        frame.pack(fill="both", expand=True)
+        self.current_frame = frame
+        self.title(title)
+
+    def show_menu(self):
+        """Shows the main menu (pages passed this as their way back)."""
+        self.show_frame(self.menu_frame, MENU_TITLE)
+
+    def show_page(self, name):
+        """Shows a page, building it the first time it is opened."""
+        with tracing.span(f"main.show_page {name}"):
+            if name not in self.pages:
+                builder, _ = PAGES[name]
+                self.pages[name] = getattr(self.load_page(name), builder)(self, self.show_menu)
+            self.show_frame(self.pages[name], PAGES[name][1])
+
+    def toggle_overlay(self, event=None):
+        """Shows or hides the stage timings (F12)."""
+        if self.overlay is None:
+            import overlay
+            self.overlay = overlay.PerformanceOverlay(self)
+        self.overlay.toggle()
+
     def toggle_fullscreen(self, event=None):
         """Toggle fullscreen mode when Escape key is pressed."""
         current_state = self.attributes("-fullscreen")
@@ -29,7 +135,7 @@ class Application(tk.Tk):
 
     def create_buttons(self):
         # Header label
-        header = tk.Label(self, text="Quantum Simulation Toolkit", 
+        header = tk.Label(self.menu_frame, text="Quantum Simulation Toolkit", 
                           font=("Helvetica", 18, "bold"), fg="#edf2f4", bg="#2b2d42")
         header.pack(pady=20)
 
@@ -46,45 +152,54 @@ class Application(tk.Tk):
         }
 
         # Buttons
-        button1 = tk.Button(self, text="Single Qubit Superposition", 
+        button1 = tk.Button(self.menu_frame, text="Single Qubit Superposition", 
                             command=self.open_quantum_circuit_page, **button_style)
         button1.pack(pady=20)
 
-        button2 = tk.Button(self, text="Multi-Qubit Superposition", 
+        button2 = tk.Button(self.menu_frame, text="Multi-Qubit Superposition", 
                             command=self.multi_qubit_simulation, **button_style)
         button2.pack(pady=20)
 
-        button3 = tk.Button(self, text="Effects of Measurement and Interference Simulation",
+        button3 = tk.Button(self.menu_frame, text="Effects of Measurement and Interference Simulation",
                             command=self.open_interference_simulation, **button_style)
         button3.pack(pady=20)
 
         # Exit button
-        button4 = tk.Button(self, text="Exit", command=self.exit_application, **button_style)
+        button4 = tk.Button(self.menu_frame, text="Exit", command=self.exit_application, **button_style)
         button4.pack(pady=20)
 
     def open_quantum_circuit_page(self):
         """Function to open the quantum circuit page from sqb_h.py."""
         print("Opening Quantum Circuit page...")
-        self.withdraw()  # Hide the main window
-        sqb_h.run_sqb_window()  # Correct function name
+        self.show_page("sqb_h")
 
     def open_interference_simulation(self):
         """Function to open the interference simulation page from interference_simulation.py."""
         print("Opening Interference Simulation...")
-        self.withdraw()  # Hide the main window
-        interference.run_interference_circuit()  # Open the interference simulation window
+        self.show_page("interference")
 
     def multi_qubit_simulation(self):
         print("Opening Multi-Qubit Simulation...")
-        self.withdraw()
-        mqb_h.run_mqb_window()
+        self.show_page("mqb_h")
 
     def exit_application(self):
         """Function to exit the application."""
         print("Exiting the application...")
+        if "workers" in sys.modules:
+            sys.modules["workers"].shutdown()  # Stop the background simulation pools
+        if TRACE_PATH and "cache" in sys.modules:
+            print("Result cache:", sys.modules["cache"].get_cache().stats())
+        if TRACE_PATH:
+            tracing.export(TRACE_PATH)
+            print(f"Trace saved to {TRACE_PATH}")
+        if SESSION_PATH:
+            sys.modules["session"].stop()
+            print(f"Session saved to {SESSION_PATH}")
         self.destroy() 
 
 # Run the main application
 if __name__ == "__main__":
     app = Application()
     app.mainloop()
+    if STARTUP_CHECK:
+        sys.exit(0 if app.startup_ms is not None and app.startup_ms <= STARTUP_TARGET_MS else 1)
@@ -1,122 +1,211 @@
+import time
 import tkinter as tk
-from qiskit import QuantumCircuit
-from qiskit.visualization import plot_bloch_multivector, plot_histogram, plot_state_city
-from qiskit_aer import AerSimulator
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-import main  # Import main.py to reopen the main menu
-
-# Quantum simulator
-simulator = AerSimulator()
+import builder
+import diagrams
+import engine
+import marginals
+import render
+import session
+import simulation
+import tracing
+import workers
+
+runner = None  # Runs simulations off the Tk thread (created with the page)
+views = None  # Long-lived figure views (created on the first result)
+circuit_builder = None  # Gate-by-gate circuit with a retained statevector (builder mode)
 
 # Function to create and visualize the quantum circuit
-def create_circuit_and_visualize(num_qubits, gate_type, target_qubit, text_output, frame_output):
+def create_circuit_and_visualize(num_qubits, gate_type, target_qubit, text_output, frame_output, precision="double"):
     """Handles the creation of the quantum circuit and visualizes it."""
     try:
-        num_qubits = int(num_qubits)
-        target_qubit = int(target_qubit)
-        
-        if target_qubit >= num_qubits or target_qubit < 0:
-            if text_output.winfo_exists():  # Ensure text_output widget exists
-                text_output.insert(tk.END, "Error: Target qubit must be within the range of available qubits.\n")
-            return
-
-        # Create the quantum circuit
-        qc = QuantumCircuit(num_qubits)
-        if gate_type.upper() == "H":
-            qc.h(target_qubit)
-        elif gate_type.upper() == "X":
-            qc.x(target_qubit)
-        elif gate_type.upper() == "Y":
-            qc.y(target_qubit)
-        elif gate_type.upper() == "Z":
-            qc.z(target_qubit)
-        else:
-            if text_output.winfo_exists():  # Ensure text_output widget exists
-                text_output.insert(tk.END, f"Error: Unsupported gate type '{gate_type}'.\n")
-            return
-
-        # Save the circuit statevector and run the simulation
-        qc.save_statevector()
-        result = simulator.run(qc).result()
-        statevector = result.get_statevector()
-
-        # Clear previous visualizations
-        for widget in frame_output.winfo_children():
-            widget.destroy()
-
-        # Create a frame to hold the canvas and its scrollbars (outside frame_output)
-        scrollbar_frame = tk.Frame(frame_output, bg="#edf2f4")
-        scrollbar_frame.pack(side="bottom", fill="x", padx=20, pady=10)
+        # Build the circuit with the simulation library (raises ValueError for bad input)
+        qc = simulation.single_gate_circuit(num_qubits, gate_type, target_qubit)
+        num_qubits = qc.num_qubits
+
+        # Run the simulation on the fastest engine that supports the circuit, off the Tk thread,
+        # unless the result cache already holds the statevector for this circuit
+        simulator = engine.select_engine(qc, statevector=True)
+        dtype = simulation.PRECISIONS[precision]
+        runner.submit_statevector(
+            simulation.statevector_key(qc, dtype), simulator, qc, dtype,
+            on_done=session.recorder(
+                "mqb_h", qc, "statevector", simulator.name,
+                lambda statevector: show_results(qc, statevector, num_qubits, text_output, frame_output),
+                dtype=dtype.__name__),
+            on_error=lambda e: show_error(e, text_output))
 
-        # Create a canvas for scrollable output (inside frame_output)
-        canvas = tk.Canvas(frame_output, bg="#edf2f4")
-        canvas.pack(side="left", fill="both", expand=True)
-
-        # Add a vertical scrollbar to the canvas
-        v_scrollbar = tk.Scrollbar(frame_output, orient="vertical", command=canvas.yview)
-        v_scrollbar.pack(side="right", fill="y")
-        canvas.configure(yscrollcommand=v_scrollbar.set)
-
-        # Add a horizontal scrollbar in the new scrollbar_frame
-        h_scrollbar = tk.Scrollbar(scrollbar_frame, orient="horizontal", command=canvas.xview)
-        h_scrollbar.pack(side="bottom", fill="x")  # Only pack it once at the bottom
-        canvas.configure(xscrollcommand=h_scrollbar.set)
-
-        # Configure the scrollbar to interact with the canvas
-        canvas.configure(xscrollcommand=h_scrollbar.set)
-
-        # Create a frame to hold the widgets (this is for scrolling) with added padding
-        frame_canvas = tk.Frame(canvas, bg="#edf2f4", padx=30, pady=30)
-        canvas.create_window((0, 0), window=frame_canvas, anchor="nw")
+    except Exception as e:
+        show_error(e, text_output)
+
+# Function to run a circuit-builder operation and visualize the result
+def run_builder_operation(operation, num_qubits, text_output, frame_output):
+    """Runs append/undo/redo in order on the serial worker; a newer operation only supersedes the display of
+    an older one's result, so queued operations are never dropped."""
+    start = time.perf_counter()
+
+    def done(result):
+        # The builder evolves its statevector with the NumPy engine's gate kernels
+        session.record("mqb_h", result[0], "statevector", "numpy", result[1], time.perf_counter() - start)
+        show_results(result[0], result[1], num_qubits, text_output, frame_output)
+    runner.submit(operation, pool="serial", on_done=done, on_error=lambda e: show_error(e, text_output))
+
+# Function to append a gate to the circuit builder
+def append_gate(num_qubits, gate_type, target_qubit, control_qubit, text_output, frame_output):
+    """Appends one gate, starting a new builder when the number of qubits changes."""
+    global circuit_builder
+    try:
+        num_qubits = int(num_qubits)
+        gate = gate_type.strip().lower()
+        qubits = [int(target_qubit)]
+        if gate in ("cx", "cnot"):
+            gate = "cx"
+            qubits = [int(control_qubit), int(target_qubit)]
+        if circuit_builder is None or circuit_builder.num_qubits != num_qubits:
+            circuit_builder = builder.CircuitBuilder(num_qubits)
+        current = circuit_builder
+        run_builder_operation(lambda: current.append(gate, qubits), num_qubits, text_output, frame_output)
+    except Exception as e:
+        show_error(e, text_output)
+
+# Function to undo or redo the last builder gate
+def step_builder(direction, text_output, frame_output):
+    if circuit_builder is None:
+        return
+    current = circuit_builder
+    operation = current.undo if direction == "undo" else current.redo
+    run_builder_operation(operation, current.num_qubits, text_output, frame_output)
+
+# Function to report an error in the output text box
+def show_error(e, text_output):
+    if text_output.winfo_exists():  # Ensure text_output widget exists
+        text_output.insert(tk.END, f"Error: {str(e)}\n")
+
+# Function to build the scrollable output area and its views (once per page)
+def build_output_area(frame_output):
+    """Creates the scroll area and one long-lived view per visualization."""
+    global views
+    # Clear the initial widgets
+    for widget in frame_output.winfo_children():
+        widget.destroy()
+
+    # Create a frame to hold the canvas and its scrollbars (outside frame_output)
+    scrollbar_frame = tk.Frame(frame_output, bg="#edf2f4")
+    scrollbar_frame.pack(side="bottom", fill="x", padx=20, pady=10)
+
+    # Create a canvas for scrollable output (inside frame_output)
+    canvas = tk.Canvas(frame_output, bg="#edf2f4")
+    canvas.pack(side="left", fill="both", expand=True)
+
+    # Add a vertical scrollbar to the canvas
+    v_scrollbar = tk.Scrollbar(frame_output, orient="vertical", command=canvas.yview)
+    v_scrollbar.pack(side="right", fill="y")
+    canvas.configure(yscrollcommand=v_scrollbar.set)
+
+    # Add a horizontal scrollbar in the new scrollbar_frame
+    h_scrollbar = tk.Scrollbar(scrollbar_frame, orient="horizontal", command=canvas.xview)
+    h_scrollbar.pack(side="bottom", fill="x")  # Only pack it once at the bottom
+    canvas.configure(xscrollcommand=h_scrollbar.set)
+
+    # Create a frame to hold the widgets (this is for scrolling) with added padding
+    frame_canvas = tk.Frame(canvas, bg="#edf2f4", padx=30, pady=30)
+    canvas.create_window((0, 0), window=frame_canvas, anchor="nw")
+
+    # One view per visualization, laid out in a fixed order and shown or hidden as needed
+    views = {
+        "canvas": canvas,
+        "frame": frame_canvas,
+        "circuit": diagrams.DiagramView(frame_canvas, on_change=lambda: canvas.config(scrollregion=canvas.bbox("all"))),
+        "bloch": render.BlochView(frame_canvas),
+        "strip": render.BlochStripView(frame_canvas),
+        "histogram": render.HistogramView(frame_canvas, figsize=(6, 4)),
+        "city": render.CityView(frame_canvas),
+        "zz": render.HeatmapView(frame_canvas, figsize=(5, 4), limits=(-1, 1), cmap="coolwarm"),
+        "concurrence": render.HeatmapView(frame_canvas, figsize=(5, 4)),
+    }
+    for row, name in enumerate(["circuit", "bloch", "strip", "histogram", "city", "zz", "concurrence"]):
+        views[name].widget.grid(row=row, column=0, padx=10, pady=10)  # Add padding around widgets
+
+# Function to resize the scrollable area to its contents
+def refresh_scroll_area():
+    with tracing.span("mqb_h.tk_layout"):
+        views["frame"].update_idletasks()  # Ensure all widgets are placed
+    views["canvas"].config(scrollregion=views["canvas"].bbox("all"))  # Update the scrollable area
+
+# Function to visualize a simulated circuit
+@tracing.traced()
+def show_results(qc, statevector, num_qubits, text_output, frame_output):
+    """Updates the circuit, Bloch spheres, histogram and state city for a finished simulation."""
+    try:
+        if views is None:
+            build_output_area(frame_output)
 
         # Visualize the quantum circuit
-        circuit_fig = qc.draw(output='mpl')
-        circuit_canvas = FigureCanvasTkAgg(circuit_fig, master=frame_canvas)
-        circuit_canvas.draw()
-        circuit_canvas.get_tk_widget().pack(padx=10, pady=10)  # Add padding around widgets
+        views["circuit"].update(qc)
 
         # Visualizations based on qubit count
         if num_qubits <= 2:
             # Bloch sphere for single or two-qubit systems
-            bloch_fig = plot_bloch_multivector(statevector)
-            bloch_canvas = FigureCanvasTkAgg(bloch_fig, master=frame_canvas)
-            bloch_canvas.draw()
-            bloch_canvas.get_tk_widget().pack(padx=10, pady=10)  # Add padding around widgets
-        
+            views["bloch"].update(statevector)
+            views["bloch"].widget.grid()
+        else:
+            views["bloch"].widget.grid_remove()
+
         # Probability histogram for all qubit counts
-        probabilities = result.get_counts(qc)
-        histogram_fig = plot_histogram(probabilities)
-        histogram_canvas = FigureCanvasTkAgg(histogram_fig, master=frame_canvas)
-        histogram_canvas.draw()
-        histogram_canvas.get_tk_widget().pack(padx=10, pady=10)  # Add padding around widgets
+        views["histogram"].update_probabilities(engine.probabilities(statevector), num_qubits)
 
         # For 3 or more qubits, add state vector visualization
         if num_qubits > 2:
-            state_city_fig = plot_state_city(statevector)
-            state_city_canvas = FigureCanvasTkAgg(state_city_fig, master=frame_canvas)
-            state_city_canvas.draw()
-            state_city_canvas.get_tk_widget().pack(padx=10, pady=10)  # Add padding around widgets
-
-        frame_canvas.update_idletasks()  # Ensure all widgets are placed
-        canvas.config(scrollregion=canvas.bbox("all"))  # Update the scrollable area
+            views["city"].update(statevector)
+            views["city"].widget.grid()
+        else:
+            views["city"].widget.grid_remove()
+
+        # Per-qubit Bloch glyphs and pairwise correlations come from the marginals, computed off the Tk thread
+        # (they are shown when ready, so the views are hidden rather than left showing the previous circuit)
+        for name in ("strip", "zz", "concurrence"):
+            views[name].widget.grid_remove()
+        if num_qubits >= 2:
+            runner.submit(marginals.correlations, statevector, num_qubits, pool="thread",
+                          on_done=lambda result: show_marginals(result, num_qubits, text_output),
+                          on_error=lambda e: show_error(e, text_output))
+
+        refresh_scroll_area()
         # Show success message
         if text_output.winfo_exists():  # Ensure text_output widget exists
             text_output.insert(tk.END, "Quantum circuit created and visualized successfully!\n")
 
     except Exception as e:
-        if text_output.winfo_exists():  # Ensure text_output widget exists
-            text_output.insert(tk.END, f"Error: {str(e)}\n")
+        show_error(e, text_output)
 
-# Function to initialize the multi-qubit superposition window
-def run_mqb_window():
-    """Launches the Multi-Qubit Superposition window with modern styling."""
-    root = tk.Toplevel()  # Use Toplevel to create a new window
-    root.title("Multi-Qubit Superposition")
-    root.configure(bg="#2b2d42")  # Dark modern background
+# Function to visualize the reduced states of every qubit and pair
+@tracing.traced()
+def show_marginals(result, num_qubits, text_output):
+    """Shows the Bloch glyph strip (3 or more qubits) and the <ZZ> and concurrence heatmaps (up to
+    marginals.MAX_PAIR_QUBITS)."""
+    try:
+        vectors, zz, concurrence = result
+        if num_qubits > 2:
+            views["strip"].update(vectors)
+            views["strip"].widget.grid()
+        if zz is None:
+            refresh_scroll_area()
+            return
+        labels = [str(qubit) for qubit in range(num_qubits)]
+        views["zz"].update(zz, labels, labels, "qubit i", "qubit j", "⟨Z_i Z_j⟩")
+        views["concurrence"].update(concurrence, labels, labels, "qubit i", "qubit j", "Concurrence")
+        views["zz"].widget.grid()
+        views["concurrence"].widget.grid()
+        refresh_scroll_area()
+    except Exception as e:
+        show_error(e, text_output)
 
-    # Set fullscreen mode
-    root.attributes("-fullscreen", True)
+# Function to build the multi-qubit superposition page inside the main window (called once by main.py)
+def build_mqb_page(master, show_menu):
+    """Builds the Multi-Qubit Superposition page with modern styling; show_menu() returns to the menu."""
+    global runner, views
+    root = tk.Frame(master, bg="#2b2d42")  # Dark modern background
+    runner = workers.SimulationRunner(root)
+    views = None
 
     # Create frames for organizing the GUI
     frame_input = tk.Frame(root, bd=2, relief="sunken", padx=10, pady=10, bg="#8d99ae", width=300)  # Set width here
@@ -147,6 +236,19 @@ def run_mqb_window():
     entry_target = tk.Entry(frame_input, font=("Helvetica", 12))
     entry_target.grid(row=2, column=1, padx=10, pady=5)
 
+    label_control = tk.Label(frame_input, text="Control Qubit (CX only):",
+                             font=("Helvetica", 12), fg="#edf2f4", bg="#8d99ae")
+    label_control.grid(row=3, column=0, padx=10, pady=5, sticky="e")
+
+    entry_control = tk.Entry(frame_input, font=("Helvetica", 12))
+    entry_control.grid(row=3, column=1, padx=10, pady=5)
+
+    # Single precision halves the memory of large statevectors
+    single_var = tk.BooleanVar(value=False)
+    single_check = tk.Checkbutton(frame_input, text="Single Precision (complex64)", variable=single_var,
+                                  font=("Helvetica", 12), fg="#edf2f4", bg="#8d99ae", selectcolor="#2b2d42")
+    single_check.grid(row=4, column=0, columnspan=2, pady=5)
+
     # Define button style
     button_style = {
         "font": ("Helvetica", 12),
@@ -161,19 +263,41 @@ def run_mqb_window():
     # Generate Circuit Button
     button_generate = tk.Button(frame_input, text="Generate Circuit", 
                                  command=lambda: create_circuit_and_visualize(
-                                     entry_qubits.get(), entry_gate.get(), entry_target.get(), text_output, frame_output
+                                     entry_qubits.get(), entry_gate.get(), entry_target.get(), text_output, frame_output,
+                                     "single" if single_var.get() else "double"
                                  ), 
                                  **button_style)
-    button_generate.grid(row=3, column=0, columnspan=2, pady=10)
+    button_generate.grid(row=5, column=0, columnspan=2, pady=10)
+
+    # Circuit builder: gates are appended one by one to the same circuit
+    button_append = tk.Button(frame_input, text="Append Gate",
+                              command=lambda: append_gate(
+                                  entry_qubits.get(), entry_gate.get(), entry_target.get(), entry_control.get(),
+                                  text_output, frame_output
+                              ),
+                              **button_style)
+    button_append.grid(row=6, column=0, columnspan=2, pady=10)
+
+    button_undo = tk.Button(frame_input, text="Undo Gate",
+                            command=lambda: step_builder("undo", text_output, frame_output), **button_style)
+    button_undo.grid(row=7, column=0, pady=10)
+
+    button_redo = tk.Button(frame_input, text="Redo Gate",
+                            command=lambda: step_builder("redo", text_output, frame_output), **button_style)
+    button_redo.grid(row=7, column=1, pady=10)
+
+    # Button to cancel a simulation that is still running
+    button_cancel = tk.Button(frame_input, text="Cancel", command=runner.cancel, **button_style)
+    button_cancel.grid(row=8, column=0, columnspan=2, pady=10)
 
     # Button to return to the main menu
     def return_to_main_menu():
         """Returns to the main menu."""
-        root.destroy()  # Close the current window
-        main.Application().mainloop()  # Reopen the main menu
+        runner.cancel()
+        show_menu()  # The page stays built, so coming back is instant
 
     button_close = tk.Button(frame_input, text="Return to Main Menu", command=return_to_main_menu, **button_style)
-    button_close.grid(row=4, column=0, columnspan=2, pady=10)
+    button_close.grid(row=9, column=0, columnspan=2, pady=10)
 
     # Output fields in frame_output
     label_output = tk.Label(frame_output, text="Simulation Output:", 
@@ -183,4 +307,4 @@ def run_mqb_window():
     text_output = tk.Text(frame_output, width=60, height=20, font=("Courier", 12), bg="#f8f9fa", fg="#2b2d42")
     text_output.grid(row=1, column=0, padx=20,pady=5)
 
-    root.mainloop()
+    return root
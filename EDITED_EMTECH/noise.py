@@ -0,0 +1,197 @@
+from collections import Counter
+import numpy as np
+import engine
+import tracing
+
+# Noise channels; a configuration's "noise" level applies to its "noise_type" channel
+CHANNELS = ("bit_flip", "depolarizing", "readout")
+
+# How each Clifford gate moves a Pauli error (x, z bits per qubit) from before it to after it
+FRAME_GATES = {"h", "s", "sdg", "x", "y", "z", "id", "cx", "cz", "swap"}
+
+# Largest number of (shot x clbit) bits held in memory per chunk of noisy shots
+CHUNK_BITS = 2 ** 24
+
+
+class NoiseModel:
+    """Per-shot error rates of a noisy run.
+
+    bit_flip: probability of an X error on each qubit of every gate, after the gate.
+    depolarizing: probability of a random X, Y or Z error on each qubit of every gate.
+    readout: probability that each measured bit is reported flipped.
+    """
+
+    def __init__(self, bit_flip=0.0, depolarizing=0.0, readout=0.0):
+        self.bit_flip, self.depolarizing, self.readout = float(bit_flip), float(depolarizing), float(readout)
+        for channel, p in zip(CHANNELS, self.rates()):
+            if not 0 <= p <= 1:
+                raise ValueError(f"The {channel.replace('_', ' ')} probability must be between 0 and 1.")
+
+    def rates(self):
+        """Returns (bit_flip, depolarizing, readout)."""
+        return self.bit_flip, self.depolarizing, self.readout
+
+    @property
+    def ideal(self):
+        """True when every rate is zero."""
+        return not any(self.rates())
+
+    def key(self):
+        """Returns the rates as a dict for result-cache keys and JSON output."""
+        return dict(zip(CHANNELS, self.rates()))
+
+    def to_aer(self):
+        """Builds the equivalent qiskit_aer NoiseModel (used for circuits outside FRAME_GATES)."""
+        from qiskit_aer.noise import NoiseModel as AerNoiseModel, ReadoutError, pauli_error
+        model = AerNoiseModel()
+        error = None
+        for p, paulis in ((self.bit_flip, [("X", 1.0)]),
+                          (self.depolarizing, [("X", 1 / 3), ("Y", 1 / 3), ("Z", 1 / 3)])):
+            if p > 0:
+                channel = pauli_error([(pauli, p * weight) for pauli, weight in paulis] + [("I", 1 - p)])
+                error = channel if error is None else error.compose(channel)
+        if error is not None:
+            model.add_all_qubit_quantum_error(error, ["h", "s", "sdg", "x", "y", "z", "id", "sx", "rx", "ry",
+                                                      "rz", "u", "p", "t", "tdg"])
+            model.add_all_qubit_quantum_error(error.tensor(error), ["cx", "cz", "swap", "cy", "ch"])
+        if self.readout > 0:
+            model.add_all_qubit_readout_error(ReadoutError([[1 - self.readout, self.readout],
+                                                            [self.readout, 1 - self.readout]]))
+        return model
+
+
+# Function to read the noise of a configuration dict
+def from_config(config):
+    """Builds the NoiseModel of a simulation.run() config.
+
+    "noise" is the level of the "noise_type" channel (bit_flip by default);
+    "bit_flip", "depolarizing" and "readout" set the channels directly.
+    """
+    rates = {channel: float(config.get(channel, 0.0)) for channel in CHANNELS}
+    level = float(config.get("noise", 0.0))
+    if level:
+        channel = config.get("noise_type", "bit_flip")
+        if channel not in CHANNELS:
+            raise ValueError(f"Unknown noise type '{channel}'.")
+        rates[channel] = level
+    return NoiseModel(**rates)
+
+
+# Function to check that errors can be carried through a circuit as Pauli frames
+def supports_frames(qc):
+    """True when every gate is in FRAME_GATES and every measurement is terminal."""
+    return engine.supports_gate_set(qc, FRAME_GATES)
+
+
+# Function to sample the X errors that reach the measurements, for every shot at once
+@tracing.traced()
+def frame_flips(qc, model, shots, rng):
+    """Returns a (shots, num_qubits) bool array of the bits each shot's errors flip at measurement.
+
+    Each gate is followed by its errors. The accumulated Pauli error of every
+    shot (its frame) is pushed through the Clifford gates that follow, so at
+    the end its X part is exactly the set of flipped measurement outcomes.
+    """
+    # Qubit-major, so each qubit's frame bits are one contiguous row
+    x = np.zeros((qc.num_qubits, shots), dtype=bool)
+    z = np.zeros((qc.num_qubits, shots), dtype=bool)
+    for name, qubits, _ in engine.circuit_operations(qc):
+        if name in engine.IGNORED_INSTRUCTIONS or name == "measure":
+            continue
+        if name == "h":
+            q = qubits[0]
+            x[q], z[q] = z[q].copy(), x[q].copy()
+        elif name in ("s", "sdg"):
+            z[qubits[0]] ^= x[qubits[0]]
+        elif name == "cx":
+            control, target = qubits
+            x[target] ^= x[control]
+            z[control] ^= z[target]
+        elif name == "cz":
+            a, b = qubits
+            z[a] ^= x[b]
+            z[b] ^= x[a]
+        elif name == "swap":
+            x[qubits] = x[qubits[::-1]]
+            z[qubits] = z[qubits[::-1]]
+        for q in qubits:
+            if model.bit_flip > 0:
+                x[q] ^= rng.random(shots, dtype=np.float32) < model.bit_flip
+            if model.depolarizing > 0:
+                # One uniform draw picks both whether an error happens and which Pauli it is
+                r = rng.random(shots, dtype=np.float32) * (3 / model.depolarizing)
+                x[q] ^= r < 2  # X or Y
+                z[q] ^= (r >= 1) & (r < 3)  # Y or Z
+    return x.T
+
+
+# Function to expand counts into one row of clbits per shot
+def counts_to_bits(counts, width):
+    """Returns a (shots, width) bool array holding every shot of a counts dict, grouped by outcome."""
+    keys = [key.replace(" ", "") for key in counts]
+    if not keys:
+        return np.zeros((0, width), dtype=bool)
+    rows = np.frombuffer("".join(keys).encode(), dtype=np.uint8).reshape(len(keys), width)[:, ::-1] == ord("1")
+    return np.repeat(rows, list(counts.values()), axis=0)
+
+
+# Function to prepare noisy shots of a circuit
+@tracing.traced()
+def sampler(qc, model, seed=None, engine_name=None):
+    """Returns a function that draws noisy shots and returns Qiskit-style counts.
+
+    Noiseless outcomes come from the named (or fastest) engine, as rows of bits
+    when it has a bit_sampler; the errors of every shot are then drawn as bulk
+    masks and XORed onto them. Shots are independent, so grouping the
+    noiseless outcomes by value does not bias the result.
+    Circuits outside FRAME_GATES run on Aer with the equivalent noise model.
+    """
+    rng = np.random.default_rng(seed)
+    if model.ideal:
+        sim = engine.get_engine(engine_name) if engine_name else engine.select_engine(qc)
+        return sim.sampler(qc, int(rng.integers(2 ** 32)))
+    if not supports_frames(qc):
+        return _aer_sampler(qc, model, rng)
+
+    sim = engine.get_engine(engine_name) if engine_name else engine.select_engine(qc)
+    width = qc.num_clbits
+    if hasattr(sim, "bit_sampler"):
+        ideal = sim.bit_sampler(qc, int(rng.integers(2 ** 32)))
+    else:
+        ideal_counts = sim.sampler(qc, int(rng.integers(2 ** 32)))
+        ideal = lambda shots: counts_to_bits(ideal_counts(shots), width)
+    measurements = [(qubits[0], clbits[0]) for name, qubits, clbits in engine.circuit_operations(qc)
+                    if name == "measure"]
+    qubits = [qubit for qubit, _ in measurements]
+    clbits = [clbit for _, clbit in measurements]
+
+    def draw(shots):
+        counts = Counter()
+        chunk = max(1, CHUNK_BITS // max(qc.num_qubits, width, 1))
+        for start in range(0, shots, chunk):
+            size = min(chunk, shots - start)
+            bits = ideal(size)
+            bits[:, clbits] ^= frame_flips(qc, model, size, rng)[:, qubits]
+            if model.readout > 0:
+                bits ^= rng.random(bits.shape, dtype=np.float32) < model.readout
+            counts.update(engine.counts_from_bits(bits))
+        return dict(counts)
+    return draw
+
+
+def _aer_sampler(qc, model, rng):
+    from qiskit_aer import AerSimulator
+    simulator = AerSimulator(noise_model=model.to_aer())
+
+    def draw(shots):
+        with tracing.span("aer.execute"):
+            result = simulator.run(qc, shots=shots, seed_simulator=int(rng.integers(2 ** 31))).result()
+        with tracing.span("aer.get_counts"):
+            return result.get_counts()
+    return draw
+
+
+# Function to get noisy measurement counts
+def run_counts(qc, model, shots, seed=None, engine_name=None):
+    """Returns counts of shots noisy shots of the circuit."""
+    return sampler(qc, model, seed, engine_name)(shots)
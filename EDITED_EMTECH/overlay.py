@@ -0,0 +1,74 @@
+import tkinter as tk
+from tkinter import filedialog, messagebox
+import tracing
+
+
+class PerformanceOverlay:
+    """Stage timings (last/p50/p95 and peak memory) floating over the top-right corner of the window.
+
+    Showing the overlay turns tracing on; hiding it turns tracing off again
+    unless tracing was already on when the overlay was shown.
+    """
+
+    refresh_ms = 500
+
+    def __init__(self, root):
+        self.root = root
+        self.visible = False
+        self.was_enabled = False
+        self.after_id = None  # Pending refresh, so hiding the overlay can stop the loop
+        self.frame = tk.Frame(root, bg="#2b2d42", highlightthickness=1, highlightbackground="#8d99ae")
+        self.table = tk.Label(self.frame, font=("Courier", 9), fg="#edf2f4", bg="#2b2d42",
+                              justify="left", anchor="w")
+        self.table.pack(padx=8, pady=(8, 4))
+
+        # Button style
+        button_style = {
+            "font": ("Helvetica", 9),
+            "bg": "#8d99ae",
+            "fg": "#edf2f4",
+            "activebackground": "#ef233c",
+            "activeforeground": "#edf2f4",
+            "relief": "flat",
+        }
+        buttons = tk.Frame(self.frame, bg="#2b2d42")
+        buttons.pack(pady=(0, 8))
+        tk.Button(buttons, text="Export Trace", command=self.export, **button_style).pack(side="left", padx=4)
+        tk.Button(buttons, text="Clear", command=tracing.clear, **button_style).pack(side="left", padx=4)
+
+    def toggle(self, event=None):
+        """Shows or hides the overlay."""
+        if self.visible:
+            self.visible = False
+            if self.after_id is not None:
+                self.root.after_cancel(self.after_id)
+                self.after_id = None
+            self.frame.place_forget()
+            if not self.was_enabled:
+                tracing.disable()
+            return
+        self.was_enabled = tracing.ENABLED
+        if not tracing.ENABLED:
+            tracing.enable()
+        self.visible = True
+        self.frame.place(relx=1.0, rely=0.0, x=-10, y=10, anchor="ne")
+        self.refresh()
+
+    def refresh(self):
+        """Redraws the table while the overlay is visible."""
+        self.after_id = None
+        if not self.visible:
+            return
+        self.table.config(text=tracing.summary_text() if tracing.stats() else "No stages recorded yet.")
+        self.frame.lift()  # Pages packed after the overlay was placed would cover it
+        self.after_id = self.root.after(self.refresh_ms, self.refresh)
+
+    def export(self):
+        """Saves the recorded events as Chrome trace-event JSON."""
+        path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("Chrome trace", "*.json")])
+        if not path:
+            return
+        try:
+            tracing.export(path)
+        except OSError as e:
+            messagebox.showerror("Export Error", str(e))
@@ -0,0 +1,136 @@
+import heapq
+import numpy as np
+
+# Views switch to reduced data above these sizes so rendering cost stays bounded
+MAX_BARS = 32  # Histogram bars
+MAX_CITY_SIZE = 8  # Rows/columns of the state-city plot
+MAX_LABEL_LENGTH = 16  # Longer bitstrings are shortened in the middle
+TOP_K_MASS = 0.5  # Top-k view is used when the top bars hold at least this much probability
+
+
+# Function to count the 1 bits of many integers at once
+def popcount(values):
+    """Returns the number of 1 bits of every non-negative integer in values."""
+    values = np.asarray(values, dtype=np.uint64)
+    if hasattr(np, "bitwise_count"):  # NumPy 2.0+
+        return np.bitwise_count(values).astype(np.int64)
+    counts = np.zeros(values.shape, dtype=np.int64)
+    values = values.copy()
+    while values.any():
+        counts += (values & np.uint64(1)).astype(np.int64)
+        values >>= np.uint64(1)
+    return counts
+
+
+# Function to get the Hamming weight of every basis state index
+def hamming_weights(num_qubits):
+    """Returns popcount(i) for i in range(2^n), built by doubling instead of counting bits."""
+    weights = np.zeros(1, dtype=np.uint8)
+    for _ in range(num_qubits):
+        weights = np.concatenate((weights, weights + 1))
+    return weights
+
+
+# Function to total a dense probability vector by Hamming weight
+def hamming_distribution(probabilities, num_qubits):
+    """Returns the probability of each Hamming weight 0..n of a 2^n probability vector.
+
+    The index is split into high and low halves (weight = weight(high) +
+    weight(low)), so the work is two small one-hot matrix products instead of a
+    weighted bincount over all 2^n entries.
+    """
+    low = num_qubits // 2
+    high = num_qubits - low
+    grid = np.eye(high + 1)[hamming_weights(high)].T @ (
+        probabilities.reshape(2 ** high, 2 ** low) @ np.eye(low + 1)[hamming_weights(low)])
+    distribution = np.zeros(num_qubits + 1)
+    for weight in range(high + 1):
+        distribution[weight:weight + low + 1] += grid[weight]
+    return distribution
+
+
+# Function to shorten long bitstrings for axis labels
+def short_label(label, max_length=MAX_LABEL_LENGTH):
+    """Keeps the first and last bits of a long label."""
+    if len(label) <= max_length:
+        return label
+    half = (max_length - 1) // 2
+    return label[:half] + "…" + label[-half:]
+
+
+# Function to choose a bounded set of bars for a distribution
+def _summarize(weights, label, by_hamming_weight, max_bars, outcomes=None):
+    outcomes = len(weights) if outcomes is None else outcomes
+    if outcomes <= max_bars:
+        labels = [label(i) for i in range(len(weights))]
+        order = np.argsort(labels)
+        return [labels[i] for i in order], weights[order], ""
+
+    # Top-k when a few outcomes dominate, otherwise aggregate by Hamming weight.
+    # The top bars cannot reach TOP_K_MASS unless the largest one is big enough,
+    # which skips the partition for flat distributions.
+    total = weights.sum()
+    top = None
+    if weights.max() * (max_bars - 1) >= TOP_K_MASS * total:
+        top = np.argpartition(weights, -(max_bars - 1))[-(max_bars - 1):]
+    if top is not None and weights[top].sum() >= TOP_K_MASS * total:
+        labels = [label(i) for i in top]
+        order = np.argsort(labels)
+        title = f"Top {len(top)} of {outcomes} outcomes"
+        return [labels[i] for i in order] + ["other"], np.append(weights[top][order], total - weights[top].sum()), title
+
+    by_weight = by_hamming_weight()
+    if len(by_weight) <= max_bars:
+        return [str(w) for w in range(len(by_weight))], by_weight, "Outcomes grouped by Hamming weight"
+    edges = np.linspace(0, len(by_weight), max_bars + 1).astype(int)
+    binned = np.add.reduceat(by_weight, edges[:-1])
+    labels = [f"{a}-{b - 1}" for a, b in zip(edges[:-1], edges[1:])]
+    return labels, binned, "Outcomes grouped by Hamming weight ranges"
+
+
+# Function to summarize a counts dictionary
+def summarize_counts(counts, max_bars=MAX_BARS):
+    """Returns (labels, weights, title) with at most max_bars entries for a {bitstring: count} dict."""
+    keys = list(counts)
+    weights = np.fromiter(counts.values(), dtype=float, count=len(keys))
+    width = len(keys[0]) if keys else 0
+    hamming = lambda: np.bincount([key.count("1") for key in keys], weights=weights, minlength=width + 1)
+    return _summarize(weights, lambda i: keys[i], hamming, max_bars)
+
+
+# Function to summarize a probability vector
+def summarize_probabilities(probabilities, num_qubits, max_bars=MAX_BARS, threshold=1e-12):
+    """Like summarize_counts, but for the 2^n basis-state probabilities of a statevector."""
+    nonzero = probabilities > threshold
+    outcomes = np.count_nonzero(nonzero)
+    if outcomes > max_bars:
+        # Reduced views are unaffected by the zero entries, so skip gathering the non-zero ones
+        return _summarize(probabilities, lambda i: format(int(i), f"0{num_qubits}b"),
+                          lambda: hamming_distribution(probabilities, num_qubits), max_bars, outcomes)
+    indices = np.flatnonzero(nonzero)
+    weights = probabilities[indices]
+    hamming = lambda: np.bincount(popcount(indices), weights=weights, minlength=num_qubits + 1)
+    return _summarize(weights, lambda i: format(int(indices[i]), f"0{num_qubits}b"), hamming, max_bars)
+
+
+# Function to describe a counts dictionary in a short label
+def counts_text(counts, limit=8):
+    """Returns str(counts) for small results, else the number of outcomes and the most frequent ones."""
+    if len(counts) <= limit:
+        return str(counts)
+    top = heapq.nlargest(limit, counts.items(), key=lambda item: item[1])
+    shown = ", ".join(f"'{short_label(key)}': {value}" for key, value in top)
+    return f"{len(counts)} distinct outcomes, most frequent: {{{shown}, ...}}"
+
+
+# Function to downsample the density matrix of a pure state
+def tiled_density_matrix(state, max_size=MAX_CITY_SIZE):
+    """Returns (rho, tile) where rho averages |state><state| over tile x tile blocks.
+
+    Block sums of a pure-state density matrix are outer products of the block
+    sums of the amplitudes, so this costs O(2^n) instead of O(4^n).
+    """
+    dimension = len(state)
+    tile = max(1, dimension // max_size)
+    sums = np.asarray(state).reshape(dimension // tile, tile).sum(axis=1)
+    return np.outer(sums, np.conj(sums)) / tile ** 2, tile
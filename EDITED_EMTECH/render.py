@@ -0,0 +1,409 @@
+import time
+import tkinter as tk
+from types import SimpleNamespace
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+import engine
+import reduction
+import tracing
+
+# Colors shared with qiskit.visualization
+BAR_COLOR = "#648fff"
+VECTOR_COLOR = "#dc267f"
+NEGATIVE_COLOR = "#e6e6e6"
+
+FRAME_MS = 16  # About 60 frames per second
+ANIMATION_MS = 500  # Length of one animated gate
+
+# Viewing direction of the Bloch glyphs (matplotlib's default 3D view)
+GLYPH_AZIMUTH = np.radians(-60)
+GLYPH_ELEVATION = np.radians(30)
+
+
+class FigureView:
+    """One long-lived Figure and Tk canvas for a view.
+
+    Figures are built with matplotlib.figure.Figure instead of pyplot, so they
+    never pile up in pyplot's registry; updates change existing artists. With
+    master=None the view renders off-screen on an Agg canvas (benchmarks and
+    other headless use) and has no widget.
+    """
+
+    def __init__(self, master, figsize):
+        self.figure = Figure(figsize=figsize)
+        if master is None:
+            self.canvas = FigureCanvasAgg(self.figure)
+            self.widget = None
+        else:
+            self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+            self.widget = self.canvas.get_tk_widget()
+        # Full redraws (also the ones Tk runs at idle after draw_idle) show up as "render.<View>.draw" stages
+        self.canvas.draw = tracing.traced(f"render.{type(self).__name__}.draw")(self.canvas.draw)
+
+
+# Function to precompute the frames of an animated rotation
+def rotation_path(vector, axis, angle, frames):
+    """Returns (frames, 3) points of vector turned about the unit axis by an eased 0..angle (Rodrigues)."""
+    t = np.linspace(0, 1, frames + 1)[1:, None]
+    phi = angle * t * t * (3 - 2 * t)  # Smoothstep: start and stop gently
+    v, k = np.asarray(vector, dtype=float), np.asarray(axis, dtype=float)
+    return v * np.cos(phi) + np.cross(k, v) * np.sin(phi) + k * np.dot(k, v) * (1 - np.cos(phi))
+
+
+class BlochView(FigureView):
+    """Bloch spheres whose static geometry is drawn once; only the vectors are blitted.
+
+    animate() turns a vector along a gate's rotation: the frames are computed
+    up front and one is blitted every FRAME_MS. Vectors set while an animation
+    runs are shown when it ends.
+    """
+
+    def __init__(self, master, num_qubits=1, figsize=(4, 4)):
+        super().__init__(master, figsize)
+        self.num_qubits = 0
+        self.background = None
+        self.vectors = []
+        self.current = []  # Vector shown for each qubit
+        self.animation = None  # (qubit, path, start time, after id) while animating
+        self.pending = None  # Vectors to show once the animation ends
+        self.canvas.mpl_connect("draw_event", self._on_draw)
+        self._build(num_qubits)
+
+    def _build(self, num_qubits):
+        """Draws the sphere wireframes, axes and labels for the given number of qubits."""
+        self.finish_animation()
+        self.figure.clear()
+        self.figure.set_size_inches(4 * num_qubits, 4)
+        if self.widget is not None:
+            # A Tk canvas has no figure manager, so the widget and its photo image are resized here;
+            # otherwise the wider figure would be blitted into the old photo and cut off
+            width, height = self.canvas.get_width_height(physical=True)
+            self.widget.configure(width=width, height=height)
+            self.canvas.resize(SimpleNamespace(width=width, height=height))
+        self.num_qubits = num_qubits
+        self.vectors = []
+        self.current = [(0.0, 0.0, 1.0)] * num_qubits
+        u, v = np.mgrid[0:2 * np.pi:25j, 0:np.pi:13j]
+        circle = np.linspace(0, 2 * np.pi, 100)
+        for qubit in range(num_qubits):
+            ax = self.figure.add_subplot(1, num_qubits, qubit + 1, projection="3d")
+            ax.set_axis_off()
+            ax.set_box_aspect((1, 1, 1))
+            ax.set_xlim(-1, 1)
+            ax.set_ylim(-1, 1)
+            ax.set_zlim(-1, 1)
+            ax.plot_wireframe(np.cos(u) * np.sin(v), np.sin(u) * np.sin(v), np.cos(v),
+                              color="#d0d0d0", linewidth=0.4)
+            ax.plot(np.cos(circle), np.sin(circle), 0, color="gray", linewidth=0.6)
+            ax.plot(np.zeros_like(circle), np.sin(circle), np.cos(circle), color="gray", linewidth=0.6)
+            for axis in np.eye(3):
+                ax.plot(*[[-a, a] for a in axis], color="gray", linewidth=0.6)
+            for position, label in (((0, 0, 1.2), "|0⟩"), ((0, 0, -1.3), "|1⟩"),
+                                    ((1.3, 0, 0), "x"), ((0, 1.3, 0), "y")):
+                ax.text(*position, label, ha="center", va="center")
+            ax.set_title(f"qubit {qubit}")
+            line, = ax.plot([0, 0], [0, 0], [0, 1], color=VECTOR_COLOR, linewidth=3, animated=True)
+            point, = ax.plot([0], [0], [1], "o", color=VECTOR_COLOR, animated=True)
+            self.vectors.append((ax, line, point))
+        self.figure.tight_layout()
+        self.canvas.draw()
+
+    def _on_draw(self, event):
+        # Any full redraw (first draw, resize) refreshes the cached background
+        self.background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._draw_vectors()
+
+    def _draw_vectors(self):
+        for ax, line, point in self.vectors:
+            ax.draw_artist(line)
+            ax.draw_artist(point)
+
+    @tracing.traced()
+    def update(self, state):
+        """Points every Bloch vector at the reduced state of its qubit."""
+        num_qubits = int(np.log2(len(state)))
+        if num_qubits != self.num_qubits:
+            self._build(num_qubits)
+        self.set_vectors(engine.bloch_vectors(state, num_qubits))
+
+    @tracing.traced()
+    def set_vectors(self, vectors):
+        """Moves the vector artists and blits them over the cached sphere (after any running animation)."""
+        if self.animation is not None:
+            self.pending = vectors
+            return
+        self._show(vectors)
+
+    def animate(self, axis, angle, qubit=0, duration_ms=ANIMATION_MS):
+        """Turns one qubit's vector about axis by angle (radians), starting from the vector shown now."""
+        self.finish_animation()
+        path = rotation_path(self.current[qubit], axis, angle, max(1, duration_ms // FRAME_MS))
+        if self.widget is None:
+            self._show(self._with_vector(qubit, path[-1]))  # No event loop to animate with
+            return
+        self.animation = (qubit, path, time.perf_counter(), None)
+        self._next_frame()
+
+    def finish_animation(self):
+        """Jumps a running animation to its end."""
+        if self.animation is None:
+            return
+        qubit, path, _, after_id = self.animation
+        if after_id is not None:
+            self.widget.after_cancel(after_id)
+        self._show(self._with_vector(qubit, path[-1]))
+        self._end_animation()
+
+    def _next_frame(self):
+        qubit, path, start, _ = self.animation
+        # Pick the frame by elapsed time, so slow frames shorten the path instead of the animation
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        index = min(len(path) - 1, int(elapsed_ms / FRAME_MS))
+        self._show(self._with_vector(qubit, path[index]))
+        if index == len(path) - 1:
+            self._end_animation()
+        else:
+            self.animation = (qubit, path, start, self.widget.after(FRAME_MS, self._next_frame))
+
+    def _end_animation(self):
+        self.animation = None
+        if self.pending is not None:
+            vectors, self.pending = self.pending, None
+            self._show(vectors)
+
+    def _with_vector(self, qubit, vector):
+        vectors = list(self.current)
+        vectors[qubit] = tuple(vector)
+        return vectors
+
+    def _show(self, vectors):
+        self.current = [tuple(vector) for vector in vectors]
+        for (ax, line, point), (x, y, z) in zip(self.vectors, vectors):
+            line.set_data_3d([0, x], [0, y], [0, z])
+            point.set_data_3d([x], [y], [z])
+        if self.background is None:
+            self.canvas.draw()
+            return
+        self.canvas.restore_region(self.background)
+        self._draw_vectors()
+        self.canvas.blit(self.figure.bbox)
+
+
+class BlochStripView:
+    """Scrollable row of small 2D Bloch glyphs on a Tk canvas, one per qubit, for registers too wide for BlochView.
+
+    Only the glyphs in the visible part of the strip exist as canvas items;
+    scrolling or resizing redraws the few in view, so the cost of a redraw
+    does not grow with the number of qubits. Shorter arrows mean a qubit is
+    entangled with the rest of the register.
+    """
+
+    glyph_size = 96  # Pixels per qubit
+
+    def __init__(self, master, width=640):
+        self.widget = tk.Frame(master, bg="#edf2f4")
+        self.canvas = tk.Canvas(self.widget, width=width, height=self.glyph_size + 16, bg="white",
+                                highlightthickness=0)
+        scrollbar = tk.Scrollbar(self.widget, orient="horizontal", command=self.canvas.xview)
+        self.canvas.configure(xscrollcommand=lambda first, last: (scrollbar.set(first, last), self._draw_visible()))
+        self.canvas.pack(side="top", fill="x")
+        scrollbar.pack(side="bottom", fill="x")
+        self.vectors = np.zeros((0, 3))
+        self.drawn = None  # (first, last) qubits currently drawn
+        # Screen directions of the x, y and z axes
+        azimuth, elevation = GLYPH_AZIMUTH, GLYPH_ELEVATION
+        self.projection = np.array([[-np.sin(azimuth), np.cos(azimuth), 0],
+                                    [-np.sin(elevation) * np.cos(azimuth), -np.sin(elevation) * np.sin(azimuth),
+                                     np.cos(elevation)]]).T
+
+    @tracing.traced()
+    def update(self, vectors):
+        """Shows a (num_qubits, 3) array of Bloch vectors."""
+        self.vectors = np.asarray(vectors, dtype=float)
+        self.canvas.config(scrollregion=(0, 0, len(self.vectors) * self.glyph_size, self.glyph_size + 16))
+        self.drawn = None
+        self._draw_visible()
+
+    def _draw_visible(self):
+        size = self.glyph_size
+        left = self.canvas.canvasx(0)
+        first = max(0, int(left // size))
+        last = min(len(self.vectors), int((left + self.canvas.winfo_width()) // size) + 1)
+        if (first, last) == self.drawn:
+            return
+        self.drawn = (first, last)
+        self.canvas.delete("glyph")
+        radius = 0.38 * size
+        tips = self.vectors[first:last] @ self.projection * radius
+        for qubit, (dx, dy) in zip(range(first, last), tips):
+            x, y = qubit * size + size / 2, size / 2 + 2
+            self.canvas.create_oval(x - radius, y - radius, x + radius, y + radius, outline="#a0a0a0", tags="glyph")
+            flat = radius * np.sin(GLYPH_ELEVATION)
+            self.canvas.create_oval(x - radius, y - flat, x + radius, y + flat, outline="#d0d0d0", dash=(2, 2),
+                                    tags="glyph")
+            self.canvas.create_line(x, y, x + dx, y - dy, fill=VECTOR_COLOR, width=3, arrow="last", tags="glyph")
+            self.canvas.create_text(x, size + 8, text=f"qubit {qubit}", font=("Helvetica", 8), tags="glyph")
+
+
+class HistogramView(FigureView):
+    """Bar chart of counts or probabilities whose bars are updated in place.
+
+    Distributions with more than reduction.MAX_BARS outcomes are reduced to the
+    top-k outcomes plus an "other" bar, or grouped by Hamming weight.
+    """
+
+    def __init__(self, master, figsize=(4, 3)):
+        super().__init__(master, figsize)
+        self.ax = self.figure.add_subplot(1, 1, 1)
+        self.keys = None
+        self.bars = None
+        self.labels = []
+
+    @tracing.traced()
+    def update(self, data):
+        """Shows a {bitstring: value} dict, like qiskit's plot_histogram."""
+        counts = all(isinstance(value, (int, np.integer)) for value in data.values())
+        self.show(*reduction.summarize_counts(data), counts=counts)
+
+    @tracing.traced()
+    def update_probabilities(self, probabilities, num_qubits):
+        """Shows the basis-state probabilities of a statevector without building a dict."""
+        self.show(*reduction.summarize_probabilities(probabilities, num_qubits))
+
+    def show(self, keys, values, title="", counts=False):
+        """Draws already reduced bars; counts selects integer value labels."""
+        values = np.asarray(values, dtype=float)
+        shown = values / values.sum() if len(values) else values
+
+        if keys != self.keys:
+            # New outcomes: rebuild the bars once, then reuse them while the keys stay the same
+            self.ax.clear()
+            self.bars = self.ax.bar(range(len(keys)), shown, color=BAR_COLOR)
+            self.ax.set_xticks(range(len(keys)))
+            self.ax.set_xticklabels([reduction.short_label(key) for key in keys], rotation=70, fontsize=8)
+            self.ax.set_ylabel("Probability")
+            self.ax.set_ylim(0, 1.1)
+            self.ax.grid(axis="y", linestyle="--", alpha=0.5)
+            self.labels = [self.ax.text(i, 0, "", ha="center", va="bottom", fontsize=7)
+                           for i in range(len(keys))]
+            self.ax.set_title(title, fontsize=9)
+            self.keys = keys
+            self.figure.tight_layout()
+
+        for bar, label, height, value in zip(self.bars, self.labels, shown, values):
+            bar.set_height(height)
+            label.set_y(height)
+            label.set_text(f"{int(value)}" if counts else f"{value:.3f}")
+        self.canvas.draw_idle()
+
+
+# Function to build the six faces of many 3D bars at once
+def _bar_faces(x, y, heights, width=0.5):
+    """Returns a (bars * 6, 4, 3) array of cuboid faces for bars standing on the xy-plane."""
+    x0, y0 = x - width / 2, y - width / 2
+    x1, y1 = x0 + width, y0 + width
+    z0, z1 = np.minimum(heights, 0), np.maximum(heights, 0)
+    corners = {
+        "000": (x0, y0, z0), "100": (x1, y0, z0), "110": (x1, y1, z0), "010": (x0, y1, z0),
+        "001": (x0, y0, z1), "101": (x1, y0, z1), "111": (x1, y1, z1), "011": (x0, y1, z1),
+    }
+    faces = (("000", "100", "110", "010"), ("001", "101", "111", "011"),
+             ("000", "100", "101", "001"), ("010", "110", "111", "011"),
+             ("000", "010", "011", "001"), ("100", "110", "111", "101"))
+    verts = np.stack([np.stack([np.stack(corners[c], axis=-1) for c in face], axis=1)
+                      for face in faces], axis=1)
+    return verts.reshape(-1, 4, 3)
+
+
+class CityView(FigureView):
+    """State-city plot (real and imaginary density-matrix bars) with reusable bar collections.
+
+    States larger than reduction.MAX_CITY_SIZE basis states are shown as tiles
+    averaging blocks of the density matrix, labelled by their leading bits.
+    """
+
+    def __init__(self, master, figsize=(8, 4)):
+        super().__init__(master, figsize)
+        self.axes = [self.figure.add_subplot(1, 2, i + 1, projection="3d") for i in range(2)]
+        self.collections = [None, None]
+        self.dimension = None
+
+    @tracing.traced()
+    def update(self, state):
+        """Shows Re(rho) and Im(rho) of the pure state |state><state|."""
+        rho, tile = reduction.tiled_density_matrix(state)
+        dimension = len(rho)
+        xs, ys = np.meshgrid(np.arange(dimension), np.arange(dimension))
+        xs, ys = xs.ravel(), ys.ravel()
+        if len(state) != self.dimension:
+            labels = [format(i, f"0{int(np.log2(dimension))}b") + ("…" if tile > 1 else "")
+                      for i in range(dimension)]
+            suffix = ", block means" if tile > 1 else ""
+            for ax, title in zip(self.axes, ("Re[ρ]", "Im[ρ]")):
+                ax.clear()
+                ax.set_title(title + suffix)
+                ax.set_xticks(range(dimension))
+                ax.set_yticks(range(dimension))
+                ax.set_xticklabels(labels, fontsize=7)
+                ax.set_yticklabels(labels, fontsize=7)
+                ax.set_zlim(-1, 1)
+            self.collections = [None, None]
+            self.dimension = len(state)
+
+        for i, part in enumerate((rho.real, rho.imag)):
+            heights = part.ravel()
+            if tile > 1:
+                # Block means shrink with the block size, so scale the z-axis to the tiles shown
+                limit = max(np.abs(rho).max(), 1e-12)
+                self.axes[i].set_zlim(-limit, limit)
+            faces = _bar_faces(xs, ys, heights)
+            colors = np.repeat(np.where(heights >= 0, BAR_COLOR, NEGATIVE_COLOR), 6)
+            if self.collections[i] is None:
+                self.collections[i] = Poly3DCollection(faces, edgecolor="k", linewidth=0.2)
+                self.axes[i].add_collection3d(self.collections[i])
+            else:
+                self.collections[i].set_verts(faces)
+            self.collections[i].set_facecolor(colors)
+        self.canvas.draw_idle()
+
+
+class HeatmapView(FigureView):
+    """Grid of one value per configuration (e.g. fidelity over qubits x noise), updated in place."""
+
+    def __init__(self, master, figsize=(4, 3), limits=(0, 1), cmap="viridis"):
+        super().__init__(master, figsize)
+        self.limits = limits
+        self.cmap = cmap
+        self.ax = self.figure.add_subplot(1, 1, 1)
+        self.image = None
+        self.colorbar = None
+        self.labels = None
+
+    @tracing.traced()
+    def update(self, values, row_labels, column_labels, row_title="", column_title="", value_title=""):
+        """Shows a 2D array colored over the view's limits; rows run bottom to top (NaN cells are left blank)."""
+        labels = (list(row_labels), list(column_labels))
+        if labels != self.labels:
+            # New grid: rebuild the image once, then only swap its data while the grid stays the same
+            if self.colorbar is not None:
+                self.colorbar.remove()
+            self.ax.clear()
+            self.image = self.ax.imshow(values, vmin=self.limits[0], vmax=self.limits[1], cmap=self.cmap,
+                                        aspect="auto", origin="lower")
+            for set_ticks, set_labels, names, rotation in (
+                    (self.ax.set_yticks, self.ax.set_yticklabels, labels[0], 0),
+                    (self.ax.set_xticks, self.ax.set_xticklabels, labels[1], 45)):
+                step = max(1, len(names) // 10)  # At most about ten tick labels per axis
+                set_ticks(range(0, len(names), step))
+                set_labels(names[::step], fontsize=8, rotation=rotation)
+            self.ax.set_ylabel(row_title)
+            self.ax.set_xlabel(column_title)
+            self.colorbar = self.figure.colorbar(self.image, ax=self.ax, label=value_title)
+            self.labels = labels
+            self.figure.tight_layout()
+        else:
+            self.image.set_data(values)
+        self.canvas.draw_idle()
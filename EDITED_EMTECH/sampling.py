@@ -0,0 +1,91 @@
+from collections import Counter
+import numpy as np
+
+
+# Function to map basis-state indices to classical register values
+def indices_to_clbits(indices, measurements):
+    """Converts basis-state indices into classical bit values using (qubit, clbit) pairs."""
+    values = np.zeros_like(indices)
+    for qubit, clbit in measurements:
+        values |= ((indices >> qubit) & 1) << clbit
+    return values
+
+
+# Function to compute the output distribution of a terminal-measured circuit
+def measurement_distribution(state_probabilities, measurements):
+    """Marginalizes basis-state probabilities onto the measured clbits; returns (values, probabilities)."""
+    indices = np.arange(len(state_probabilities))
+    if sorted(measurements) == [(q, q) for q in range(len(measurements))] and \
+            len(state_probabilities) == 2 ** len(measurements):
+        return indices, state_probabilities  # Every qubit measured into its own clbit
+    values, inverse = np.unique(indices_to_clbits(indices, measurements), return_inverse=True)
+    return values, np.bincount(inverse, weights=state_probabilities)
+
+
+# Function to draw every shot from a distribution at once
+def sample_counts(values, probabilities, shots, width, rng):
+    """Draws all shots in one vectorized call and returns Qiskit-style counts.
+
+    With more shots than outcomes a single multinomial is used, so the cost depends
+    on the number of outcomes and 10^7-10^8 shots take about as long as 10^4.
+    With fewer shots, each shot is a binary search in the cumulative distribution.
+    """
+    if shots >= len(probabilities):
+        occurrences = rng.multinomial(shots, probabilities / probabilities.sum())
+        observed = np.flatnonzero(occurrences)
+    else:
+        cumulative = np.cumsum(probabilities)
+        draws = np.searchsorted(cumulative, rng.random(shots) * cumulative[-1], side="right")
+        observed, occurrences = np.unique(np.minimum(draws, len(probabilities) - 1), return_counts=True)
+        occurrences = dict(zip(observed, occurrences))
+    return {format(int(values[i]), f"0{width}b"): int(occurrences[i]) for i in observed}
+
+
+# Function to draw every shot from a distribution as rows of clbits
+def sample_bits(values, probabilities, shots, width, rng):
+    """Draws all shots like sample_counts but returns a (shots, width) bool array, grouped by outcome."""
+    if shots >= len(probabilities):
+        occurrences = rng.multinomial(shots, probabilities / probabilities.sum())
+        shot_values = np.repeat(values, occurrences)
+    else:
+        cumulative = np.cumsum(probabilities)
+        draws = np.searchsorted(cumulative, rng.random(shots) * cumulative[-1], side="right")
+        shot_values = values[np.minimum(draws, len(probabilities) - 1)]
+    return ((shot_values[:, None] >> np.arange(width)) & 1).astype(bool)
+
+
+# Function to measure how settled a histogram is
+def max_standard_error(counts, shots):
+    """Returns the largest standard error of the probabilities estimated from counts.
+
+    Outcomes not seen yet may still have a probability of about 1/shots, and an
+    outcome seen in every shot may still miss, so every estimate is kept at
+    least 1/shots away from 0 and 1 (the worst case over the support).
+    """
+    if shots == 0:
+        return float("inf")
+    estimates = np.fromiter(counts.values(), dtype=float) / shots
+    floor = min(1 / shots, 0.5)
+    estimates = np.clip(np.append(estimates, 0.0), floor, 1 - floor)
+    return float(np.sqrt(estimates * (1 - estimates) / shots).max())
+
+
+# Function to run shots progressively in growing chunks
+def stream_counts(draw, shots, tolerance=0.0, first_chunk=1000, max_chunk=1_000_000):
+    """Yields (counts, shots_done, max_standard_error) after every chunk of shots.
+
+    Chunks start small so the first histogram appears quickly and double up to
+    max_chunk. Stops early once the largest standard error is within tolerance.
+    """
+    counts = Counter()
+    done = 0
+    chunk = first_chunk
+    while done < shots:
+        size = min(chunk, shots - done)
+        counts.update(draw(size))
+        done += size
+        error = max_standard_error(counts, done)
+        yield counts, done, error
+        if tolerance > 0 and error <= tolerance:
+            return
+        chunk = min(chunk * 2, max_chunk)
@@ -0,0 +1,241 @@
+import hashlib
+import json
+import os
+import struct
+import threading
+import time
+import zlib
+import numpy as np
+import engine
+import noise
+import sampling
+import tracing
+import workers
+
+# Session logs are append-only: a header, then records of one type byte and a payload length.
+# "C" records hold a circuit (its id and zlib-compressed OpenQASM) the first time it is run;
+# "R" records hold one run: the fixed RUN fields, then its page, kind, engine and options as JSON.
+MAGIC = b"QSIMLOG1"
+HEADER = struct.Struct("<cI")
+RUN = struct.Struct("<16s16sddqq")  # circuit id, result digest, start time, seconds, shots, seed (-1: none)
+DIGEST_DECIMALS = 10  # Statevector digests ignore differences in the last bits of the amplitudes
+
+ENABLED = False
+_log = None  # Open session file while recording
+_circuits = set()  # Ids of the circuits already in it
+_lock = threading.Lock()
+
+
+# Function to start recording every simulation run
+def start(path):
+    """Appends the runs of this session to path (a new file is created with a header).
+
+    A record left incomplete by a crash is cut off first, so the new records stay readable.
+    """
+    global ENABLED, _log, _circuits
+    stop()
+    existing = os.path.exists(path) and os.path.getsize(path) > 0
+    _circuits = set()
+    if existing:
+        _, circuits, end = load(path)
+        _circuits = set(circuits)
+        if end < os.path.getsize(path):
+            os.truncate(path, end)
+    _log = open(path, "ab")
+    if not existing:
+        _log.write(MAGIC)
+        _log.flush()
+    ENABLED = True
+
+
+def stop():
+    """Stops recording and closes the session file."""
+    global ENABLED, _log
+    ENABLED = False
+    if _log is not None:
+        _log.close()
+        _log = None
+
+
+# Function to pick a seed so a recorded run can be reproduced
+def new_seed():
+    """Returns a random seed while recording, else None (unseeded runs cannot be verified on replay)."""
+    return int(np.random.default_rng().integers(2 ** 32)) if ENABLED else None
+
+
+# Function to fingerprint a statevector or counts dict
+def digest(result):
+    """Returns a 16-byte digest of a result; statevectors are rounded to DIGEST_DECIMALS first."""
+    if isinstance(result, np.ndarray):
+        data = np.round(np.asarray(result, dtype=complex), DIGEST_DECIMALS) + 0.0  # + 0.0 turns -0.0 into 0.0
+        payload = data.tobytes()
+    else:
+        payload = json.dumps(sorted((key, int(value)) for key, value in result.items())).encode()
+    return hashlib.blake2b(payload, digest_size=16).digest()
+
+
+# Function to log one run
+@tracing.traced()
+def record(page, qc, kind, engine_name, result, seconds, shots=0, seed=None, **options):
+    """Appends a run (kind "statevector" or "counts") to the session file; does nothing unless recording.
+
+    options are stored as JSON: noise (NoiseModel.key()), dtype, stream and tolerance.
+    """
+    if not ENABLED:
+        return
+    from qiskit import qasm2
+    qasm = qasm2.dumps(qc).encode()
+    circuit_id = hashlib.blake2b(qasm, digest_size=16).digest()
+    fields = json.dumps({"page": page, "kind": kind, "engine": engine_name, **options}).encode()
+    run = RUN.pack(circuit_id, digest(result), time.time() - seconds, seconds, shots, -1 if seed is None else seed)
+    with _lock:
+        if _log is None:
+            return
+        data = b""
+        if circuit_id not in _circuits:
+            circuit = circuit_id + zlib.compress(qasm)
+            data += HEADER.pack(b"C", len(circuit)) + circuit
+            _circuits.add(circuit_id)
+        data += HEADER.pack(b"R", len(run) + len(fields)) + run + fields
+        _log.write(data)  # One write per run, so a crash loses at most the last record
+        _log.flush()
+
+
+# Function to time a run from now and log it when it finishes
+def recorder(page, qc, kind, engine_name, on_done, shots=0, seed=None, **options):
+    """Returns on_done, wrapped so the result is recorded first while a session is being recorded."""
+    if not ENABLED:
+        return on_done
+    start_time = time.perf_counter()
+
+    def done(result):
+        record(page, qc, kind, engine_name, result, time.perf_counter() - start_time, shots, seed, **options)
+        on_done(result)
+    return done
+
+
+# Function to read a session file into columns
+def load(path):
+    """Returns (runs, circuits, end): runs is a dict of columns (NumPy arrays for the numbers, lists for the
+    rest), circuits maps circuit ids to OpenQASM and end is the offset just past the last complete record.
+    A truncated last record is ignored."""
+    with open(path, "rb") as file:
+        data = file.read()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a session log.")
+    circuits = {}
+    rows = []
+    position = len(MAGIC)
+    while position + HEADER.size <= len(data):
+        kind, length = HEADER.unpack_from(data, position)
+        payload = data[position + HEADER.size:position + HEADER.size + length]
+        if len(payload) < length:
+            break
+        position += HEADER.size + length
+        if kind == b"C":
+            circuits[payload[:16]] = zlib.decompress(payload[16:]).decode()
+        elif kind == b"R":
+            rows.append(RUN.unpack_from(payload) + (json.loads(payload[RUN.size:]),))
+    columns = list(zip(*rows)) or [()] * 7
+    runs = {
+        "circuit": list(columns[0]),
+        "digest": list(columns[1]),
+        "time": np.array(columns[2], dtype=float),
+        "seconds": np.array(columns[3], dtype=float),
+        "shots": np.array(columns[4], dtype=np.int64),
+        "seed": np.array(columns[5], dtype=np.int64),
+        "fields": list(columns[6]),
+    }
+    return runs, circuits, position
+
+
+# Function to run a logged run again
+def execute(qc, kind, engine_name, shots, seed, fields):
+    """Runs one logged run on the named engine the way its page ran it and returns the result."""
+    if kind == "statevector":
+        return engine.get_engine(engine_name).run_statevector(qc, np.dtype(fields.get("dtype", "complex128")))
+    model = noise.NoiseModel(**fields.get("noise", {}))
+    if fields.get("stream"):
+        counts = {}
+        for counts, _, _ in sampling.stream_counts(noise.sampler(qc, model, seed, engine_name), shots,
+                                                   tolerance=fields.get("tolerance", 0.0)):
+            pass
+        return dict(counts)
+    return workers.run_counts(engine_name, qc, shots, seed, model)
+
+
+# Function to compare the results of two engines
+def agreement(first, second):
+    """Returns ("fidelity", |<a|b>|^2) for statevectors or ("tvd", total variation distance) for counts."""
+    if isinstance(first, np.ndarray):
+        a, b = np.asarray(first, dtype=complex), np.asarray(second, dtype=complex)
+        return "fidelity", float(abs(np.vdot(a, b)) ** 2 / (np.vdot(a, a).real * np.vdot(b, b).real))
+    total_first, total_second = sum(first.values()), sum(second.values())
+    keys = set(first) | set(second)
+    return "tvd", 0.5 * sum(abs(first.get(key, 0) / total_first - second.get(key, 0) / total_second) for key in keys)
+
+
+# Function to replay a whole session
+def replay(path, compare_engine=None):
+    """Runs every logged run again, one after another, and yields one result dict per run.
+
+    status is "match" or "mismatch" against the logged digest, or "unseeded"
+    for counts that were drawn without a seed. With compare_engine every run
+    also runs on that engine, with its time and its fidelity (statevectors) or
+    total variation distance (counts) to the logged engine's result.
+    """
+    from qiskit import qasm2
+    runs, circuits, _ = load(path)
+    parsed = {}
+    for index, fields in enumerate(runs["fields"]):
+        circuit_id = runs["circuit"][index]
+        if circuit_id not in parsed:
+            parsed[circuit_id] = qasm2.loads(circuits[circuit_id])
+        qc = parsed[circuit_id]
+        kind, engine_name = fields["kind"], fields["engine"]
+        shots = int(runs["shots"][index])
+        seed = None if runs["seed"][index] < 0 else int(runs["seed"][index])
+        row = {"index": index, "page": fields["page"], "kind": kind, "engine": engine_name,
+               "qubits": qc.num_qubits, "shots": shots, "recorded_seconds": float(runs["seconds"][index])}
+
+        start_time = time.perf_counter()
+        result = execute(qc, kind, engine_name, shots, seed, fields)
+        row["seconds"] = time.perf_counter() - start_time
+        if kind == "counts" and seed is None:
+            row["status"] = "unseeded"
+        else:
+            row["status"] = "match" if digest(result) == runs["digest"][index] else "mismatch"
+
+        if compare_engine is not None:
+            row["compare_engine"] = compare_engine
+            other_engine = engine.get_engine(compare_engine)
+            if not other_engine.supports(qc) or (kind == "statevector" and not other_engine.statevector):
+                row["compare_status"] = "unsupported"
+            else:
+                start_time = time.perf_counter()
+                other = execute(qc, kind, compare_engine, shots, seed, fields)
+                row["compare_seconds"] = time.perf_counter() - start_time
+                metric, value = agreement(result, other)
+                row[metric] = value
+        yield row
+
+
+# Function to summarize a replay
+def summary_text(rows):
+    """Returns a few lines with the verification counts and total times of replay() rows."""
+    statuses = [row["status"] for row in rows]
+    lines = [f"{len(rows)} runs: {statuses.count('match')} match, {statuses.count('mismatch')} mismatch, "
+             f"{statuses.count('unseeded')} unseeded",
+             f"recorded {sum(row['recorded_seconds'] for row in rows):.3f} s, "
+             f"replayed {sum(row['seconds'] for row in rows):.3f} s"]
+    compared = [row for row in rows if "compare_seconds" in row]
+    if compared:
+        line = f"{compared[0]['compare_engine']}: {sum(row['compare_seconds'] for row in compared):.3f} s"
+        fidelities = [row["fidelity"] for row in compared if "fidelity" in row]
+        distances = [row["tvd"] for row in compared if "tvd" in row]
+        if fidelities:
+            line += f", lowest fidelity {min(fidelities):.6f}"
+        if distances:
+            line += f", largest TVD {max(distances):.4f}"
+        lines.append(line)
+    return "\n".join(lines)
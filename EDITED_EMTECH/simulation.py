@@ -0,0 +1,165 @@
+import time
+import numpy as np
+from qiskit import QuantumCircuit
+import cache
+import engine
+import noise
+import tracing
+
+# Gates accepted by the single-gate circuit (multi-qubit page)
+SINGLE_GATES = ("h", "x", "y", "z", "s", "sdg", "t", "tdg")
+
+# Statevector precisions; single (complex64) halves the memory of large states
+PRECISIONS = {"double": np.complex128, "single": np.complex64}
+
+
+# Function to build a circuit with one gate on one qubit
+@tracing.traced()
+def single_gate_circuit(num_qubits, gate, target_qubit):
+    """Builds an n-qubit circuit with a single SINGLE_GATES gate; raises ValueError for bad input."""
+    num_qubits, target_qubit, gate = int(num_qubits), int(target_qubit), gate.strip().lower()
+    if target_qubit >= num_qubits or target_qubit < 0:
+        raise ValueError("Target qubit must be within the range of available qubits.")
+    if gate not in SINGLE_GATES:
+        raise ValueError(f"Unsupported gate type '{gate}'.")
+    qc = QuantumCircuit(num_qubits)
+    getattr(qc, gate)(target_qubit)
+    return qc
+
+
+# Function to build the interference circuit for one configuration
+@tracing.traced()
+def interference_circuit(num_qubits, hadamard=True, cnot=True, pauli_x=False):
+    """Builds the interference page's noiseless circuit; noise is added per shot when sampling (see noise.py)."""
+    qc = QuantumCircuit(num_qubits, num_qubits)
+
+    # Apply Hadamard gate to all qubits if selected
+    if hadamard:
+        qc.h(range(num_qubits))
+
+    if pauli_x:
+        qc.x(range(num_qubits))
+
+    # Apply the CNOT gates if selected
+    if cnot:
+        for i in range(num_qubits - 1):
+            qc.cx(i, i + 1)
+
+    # Measure the qubits
+    qc.measure(range(num_qubits), range(num_qubits))
+    return qc
+
+
+# Function to get the statevector of a circuit
+@tracing.traced()
+def simulate(qc, use_cache=True, dtype=complex):
+    """Returns (engine name, statevector) from the fastest statevector engine, using the result cache."""
+    sim = engine.select_engine(qc, statevector=True)
+    key = statevector_key(qc, dtype)
+    state = cache.get_cache().get(key) if use_cache else None
+    if state is None:
+        state = sim.run_statevector(qc, dtype)
+        if use_cache:
+            cache.get_cache().put(key, state)
+    return sim.name, state
+
+
+# Function to build the result-cache key of a statevector
+def statevector_key(qc, dtype=complex):
+    """Returns the cache key of the circuit's statevector; single precision is cached separately."""
+    dtype = np.dtype(dtype)
+    return cache.circuit_key(qc, kind="statevector", **({} if dtype == np.complex128 else {"dtype": dtype.name}))
+
+
+# Function to get measurement counts of a circuit
+@tracing.traced()
+def sample(qc, shots, seed=None, use_cache=True, noise_model=None):
+    """Returns (engine name, counts) from the fastest engine, using the result cache for seeded runs.
+
+    With a noise_model every shot gets its own errors (see noise.sampler).
+    Unseeded samples are never cached, so every call draws fresh shots.
+    """
+    sim = engine.select_engine(qc)
+    key = counts_key(qc, shots, seed, noise_model)
+    use_cache = use_cache and key is not None
+    counts = cache.get_cache().get(key) if use_cache else None
+    if counts is None:
+        noisy = noise_model is not None and not noise_model.ideal
+        counts = noise.run_counts(qc, noise_model, shots, seed, sim.name) if noisy else sim.run_counts(qc, shots, seed)
+        if use_cache:
+            cache.get_cache().put(key, counts)
+    return sim.name, counts
+
+
+# Function to build the result-cache key of a counts run
+def counts_key(qc, shots, seed=None, noise_model=None):
+    """Returns the cache key of the circuit's counts, or None for an unseeded run (never cached).
+
+    An ideal noise model gives the same key as no model, so noiseless runs share their entries.
+    """
+    if seed is None:
+        return None
+    noisy = noise_model is not None and not noise_model.ideal
+    return cache.circuit_key(qc, kind="counts", shots=shots, seed=seed, **(noise_model.key() if noisy else {}))
+
+
+# Function to build the circuit described by a configuration
+def build(config):
+    """Builds the circuit of a configuration dict (see run())."""
+    circuit = config.get("circuit", "interference")
+    if circuit == "interference":
+        return interference_circuit(int(config["qubits"]), bool(config.get("hadamard", True)),
+                                    bool(config.get("cnot", True)), bool(config.get("pauli_x", False)))
+    if circuit == "gate":
+        return single_gate_circuit(config["qubits"], config["gate"], config.get("target", 0))
+    if circuit == "qasm":
+        from qiskit import qasm2
+        return qasm2.loads(config["qasm"])
+    raise ValueError(f"Unknown circuit type '{circuit}'.")
+
+
+# Function to run one configuration from start to finish
+def run(config, use_cache=False):
+    """Builds, simulates and samples one configuration and returns a JSON-ready result dict.
+
+    config keys: circuit ("interference", "gate" or "qasm"); qubits, hadamard,
+    cnot, pauli_x (interference); gate, target (gate); qasm (qasm); noise and
+    noise_type, or bit_flip, depolarizing and readout (see noise.from_config);
+    output ("counts", "probabilities" or "statevector"); precision ("double"
+    or "single", for statevector outputs); shots; seed. Noise
+    only affects counts. The seed drives both the shots and their errors, so a
+    seeded run is reproducible.
+    """
+    start = time.perf_counter()
+    rng = np.random.default_rng(config.get("seed"))
+    noise_model = noise.from_config(config)
+    qc = build(config)
+    output = config.get("output", "counts")
+    result = dict(config)
+    if output == "counts":
+        if qc.num_clbits == 0:
+            qc.measure_all()
+        seed = None if config.get("seed") is None else int(rng.integers(2 ** 32))
+        name, counts = sample(qc, int(config.get("shots", 1024)), seed, use_cache, noise_model)
+        result.update(engine=name, counts=counts)
+    elif output in ("probabilities", "statevector"):
+        precision = config.get("precision", "double")
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}'.")
+        name, state = simulate(qc, use_cache, PRECISIONS[precision])
+        result.update(engine=name, probabilities=engine.probabilities_dict(state, qc.num_qubits))
+        if output == "statevector":
+            result["statevector"] = [[float(a.real), float(a.imag)] for a in state]
+    else:
+        raise ValueError(f"Unknown output '{output}'.")
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+# Function to run one configuration of a batch without stopping the batch
+def run_or_error(config, use_cache=False):
+    """Returns run(config), or {"error": message, "config": config} when the configuration fails."""
+    try:
+        return run(config, use_cache)
+    except Exception as e:
+        return {"error": f"{type(e).__name__}: {e}", "config": config}
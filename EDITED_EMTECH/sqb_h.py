@@ -1,49 +1,68 @@
 import tkinter as tk
+from tkinter import ttk
+import numpy as np
 from qiskit import QuantumCircuit
-from qiskit.visualization import plot_bloch_multivector
-from qiskit_aer import AerSimulator
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib.pyplot as plt
-import main
-
-# Initialize the quantum simulator and circuit
-sim = AerSimulator()
+import engine
+import render
+import session
+import simulation
+import tracing
+import workers
+
+# Initialize the quantum circuit
 qc = QuantumCircuit(1, name="kuyajqsi")
+runner = None  # Runs simulations off the Tk thread (created with the page)
+bloch_view = None  # Long-lived Bloch sphere canvas (created with the page)
+
+# Gate buttons: (label, gate name), three per row
+FIXED_GATES = [("H", "h"), ("X", "x"), ("Y", "y"), ("Z", "z"), ("S", "s"), ("T", "t")]
+ROTATION_AXES = {"rx": (1.0, 0.0, 0.0), "ry": (0.0, 1.0, 0.0), "rz": (0.0, 0.0, 1.0)}
 
 # Function to update the visualization
 def update_visualization(frame_output):
     global qc
-    qc.save_statevector()  # Save the statevector after any gate is applied
-    result = sim.run(qc).result()  # Run the quantum circuit on the simulator
-    state = result.data(qc)["statevector"]  # Retrieve the statevector
-    
-    # Update Bloch sphere with the current statevector
-    fig = plot_bloch_multivector(state)
-    canvas = FigureCanvasTkAgg(fig, master=frame_output)
-    canvas.draw()
-    canvas.get_tk_widget().grid(row=0, column=0, padx=10, pady=10)
-
-# Apply Hadamard gate to the current quantum circuit
-def apply_hadamard(window, frame_output):
+    # The engine simulation.simulate picks: NumPy for these gates (the stabilizer engine has no statevector)
+    sim = engine.select_engine(qc, statevector=True)
+    # Simulate in the background and draw the Bloch sphere once the statevector arrives
+    # Identical circuits are answered from the result cache without simulating
+    show = session.recorder("sqb_h", qc, "statevector", sim.name, show_state)
+    runner.submit(simulation.simulate, qc, pool="thread", on_done=lambda result: show(result[1]))
+
+# Function to draw the Bloch sphere for a statevector
+@tracing.traced()
+def show_state(state):
+    # Update Bloch sphere with the current statevector; only the vector is redrawn
+    bloch_view.update(state)
+    with tracing.span("sqb_h.tk_layout"):
+        bloch_view.widget.update_idletasks()  # Let Tk place and redraw the canvas now
+
+# Apply a gate to the current quantum circuit and animate the Bloch vector along its rotation
+def apply_gate(window, frame_output, name, params=()):
     global qc
-    qc = QuantumCircuit(1, name="kuyajqsi")  # Reset circuit to ensure a clean start
-    qc.h(0)  # Apply Hadamard gate to qubit 0
-    update_visualization(frame_output)  # Update the Bloch sphere with the new state
+    with tracing.span("sqb_h.build_circuit"):
+        qc = qc.copy()  # The previous circuit may still be on its way to a worker
+        getattr(qc, name)(*params, 0)
+    if name in ROTATION_AXES:
+        axis, angle = ROTATION_AXES[name], params[0]  # Turn the full angle, even past half a turn
+    else:
+        axis, angle = engine.bloch_rotation(engine.gate_matrix(name))
+    bloch_view.animate(axis, angle)
+    update_visualization(frame_output)  # The simulated state is shown once the animation ends
 
 # Reset circuit
 def reset_circuit(window, frame_output):
     global qc
     qc = QuantumCircuit(1, name="kuyajqsi")  # Reset the circuit to initial state
+    bloch_view.finish_animation()
     update_visualization(frame_output)  # Update the Bloch sphere with the reset state
 
-# Function to create and run the quantum circuit window (called by main.py)
-def run_sqb_window():
-    window = tk.Toplevel()
-    window.title("Quantum Circuit Simulator")
-    window.configure(bg="#2b2d42")  # Dark modern background
-    window.attributes("-fullscreen", True)  # Enable fullscreen mode
-    global qc
+# Function to build the quantum circuit page inside the main window (called once by main.py)
+def build_sqb_page(master, show_menu):
+    """Builds the page into a frame of master; show_menu() navigates back to the main menu."""
+    window = tk.Frame(master, bg="#2b2d42")  # Dark modern background
+    global qc, runner, bloch_view
     qc = QuantumCircuit(1, name="kuyajqsi")  # Reset the circuit to initial state
+    runner = workers.SimulationRunner(window)
 
     # Create frames for input and output
     frame_input = tk.Frame(window, bd=2, relief="sunken", padx=10, pady=10, bg="#8d99ae")
@@ -52,6 +71,10 @@ def run_sqb_window():
     frame_output = tk.Frame(window, bd=2, relief="sunken", padx=10, pady=10, bg="#edf2f4")
     frame_output.pack(side="right", fill="both", expand=True, padx=20, pady=20)
 
+    # One Bloch sphere canvas for the lifetime of the page
+    bloch_view = render.BlochView(frame_output)
+    bloch_view.widget.grid(row=0, column=0, padx=10, pady=10)
+
     update_visualization(frame_output)  # Now pass the frame_output after it's created
 
     # Define button style
@@ -65,32 +88,59 @@ def run_sqb_window():
         "width": 20
     }
 
-    # Button to apply the Hadamard gate
-    button_apply_hadamard = tk.Button(frame_input, text="Apply Hadamard",
-                                      command=lambda: apply_hadamard(window, frame_output),
-                                      **button_style)
-    button_apply_hadamard.grid(row=1, column=0, pady=10)
+    gate_button_style = dict(button_style, width=5)
+
+    # Buttons to apply the fixed gates; each one is added to the circuit built so far
+    frame_gates = tk.Frame(frame_input, bg="#8d99ae")
+    frame_gates.grid(row=1, column=0, pady=10)
+    for i, (label, name) in enumerate(FIXED_GATES):
+        button_gate = tk.Button(frame_gates, text=label,
+                                command=lambda name=name: apply_gate(window, frame_output, name),
+                                **gate_button_style)
+        button_gate.grid(row=i // 3, column=i % 3, padx=5, pady=5)
+
+    # Angle slider and buttons for the rotation gates
+    label_angle = tk.Label(frame_input, text="Rotation Angle: 90°", font=("Helvetica", 12), fg="#edf2f4", bg="#8d99ae")
+    label_angle.grid(row=2, column=0, pady=(10, 0))
+
+    slider_angle = ttk.Scale(frame_input, from_=0, to=360, orient="horizontal", length=200,
+                             command=lambda value: label_angle.config(text=f"Rotation Angle: {float(value):.0f}°"))
+    slider_angle.set(90)
+    slider_angle.grid(row=3, column=0, pady=5)
+
+    frame_rotations = tk.Frame(frame_input, bg="#8d99ae")
+    frame_rotations.grid(row=4, column=0, pady=10)
+    for i, name in enumerate(ROTATION_AXES):
+        button_rotation = tk.Button(frame_rotations, text=name.upper(),
+                                    command=lambda name=name: apply_gate(window, frame_output, name,
+                                                                         (np.radians(slider_angle.get()),)),
+                                    **gate_button_style)
+        button_rotation.grid(row=0, column=i, padx=5, pady=5)
 
     # Button to reset the circuit
     button_reset = tk.Button(frame_input, text="Reset Circuit",
                              command=lambda: reset_circuit(window, frame_output),
                              **button_style)
-    button_reset.grid(row=2, column=0, pady=10)
+    button_reset.grid(row=5, column=0, pady=10)
+
+    # Button to cancel a simulation that is still running
+    button_cancel = tk.Button(frame_input, text="Cancel", command=runner.cancel, **button_style)
+    button_cancel.grid(row=6, column=0, pady=10)
 
     # Button to return to the main menu
     def return_to_main_menu():
         """Returns to the main menu."""
-        window.destroy()  # Close the current window
-        main.Application().mainloop()  # Reopen the main menu
+        runner.cancel()
+        show_menu()  # The page stays built, so coming back is instant
 
     button_close = tk.Button(frame_input, text="Return to Main Menu",
                              command=return_to_main_menu,
                              **button_style)
-    button_close.grid(row=3, column=0, pady=10)
+    button_close.grid(row=7, column=0, pady=10)
 
     # Add a header to the input frame
     label_header = tk.Label(frame_input, text="Quantum Circuit Controls",
                             font=("Helvetica", 14, "bold"), fg="#edf2f4", bg="#8d99ae")
     label_header.grid(row=0, column=0, columnspan=2, pady=10, sticky="n")
 
-    window.mainloop()
+    return window
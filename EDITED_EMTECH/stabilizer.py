@@ -0,0 +1,140 @@
+import numpy as np
+
+
+class StabilizerTableau:
+    """Aaronson-Gottesman stabilizer tableau for simulating Clifford circuits."""
+
+    def __init__(self, num_qubits):
+        self.num_qubits = num_qubits
+        # Row i is the i-th stabilizer generator: X bits, Z bits and a sign bit
+        self.x = np.zeros((num_qubits, num_qubits), dtype=bool)
+        self.z = np.eye(num_qubits, dtype=bool)
+        self.r = np.zeros(num_qubits, dtype=bool)
+
+    # Clifford gate updates (conjugation of every generator)
+    def h(self, qubit):
+        self.r ^= self.x[:, qubit] & self.z[:, qubit]
+        self.x[:, qubit], self.z[:, qubit] = self.z[:, qubit].copy(), self.x[:, qubit].copy()
+
+    def s(self, qubit):
+        self.r ^= self.x[:, qubit] & self.z[:, qubit]
+        self.z[:, qubit] ^= self.x[:, qubit]
+
+    def sdg(self, qubit):
+        self.r ^= self.x[:, qubit] & ~self.z[:, qubit]
+        self.z[:, qubit] ^= self.x[:, qubit]
+
+    def x_gate(self, qubit):
+        self.r ^= self.z[:, qubit]
+
+    def y_gate(self, qubit):
+        self.r ^= self.x[:, qubit] ^ self.z[:, qubit]
+
+    def z_gate(self, qubit):
+        self.r ^= self.x[:, qubit]
+
+    def cx(self, control, target):
+        self.r ^= self.x[:, control] & self.z[:, target] & ~(self.x[:, target] ^ self.z[:, control])
+        self.x[:, target] ^= self.x[:, control]
+        self.z[:, control] ^= self.z[:, target]
+
+    def apply(self, name, qubits):
+        """Applies a named Clifford gate from CLIFFORD_GATES."""
+        if name == "id":
+            return
+        getattr(self, CLIFFORD_GATES[name])(*qubits)
+
+    def copy(self):
+        """Returns an independent copy of the tableau."""
+        tableau = StabilizerTableau.__new__(StabilizerTableau)
+        tableau.num_qubits = self.num_qubits
+        tableau.x, tableau.z, tableau.r = self.x.copy(), self.z.copy(), self.r.copy()
+        return tableau
+
+    def _multiply_rows(self, targets, source):
+        """Replaces every target generator by its product with the source generator."""
+        x1, z1 = self.x[source], self.z[source]
+        x2 = self.x[targets].astype(np.int8)
+        z2 = self.z[targets].astype(np.int8)
+        # Power of i picked up on each qubit when multiplying the two Paulis
+        phase = np.where(x1 & z1, z2 - x2,
+                         np.where(x1, z2 * (2 * x2 - 1),
+                                  np.where(z1, x2 * (1 - 2 * z2), 0)))
+        total = 2 * self.r[targets] + 2 * self.r[source] + phase.sum(axis=1)
+        self.r[targets] = (total % 4) == 2
+        self.x[targets] ^= x1
+        self.z[targets] ^= z1
+
+    def _swap_rows(self, a, b):
+        """Swaps two generators."""
+        for table in (self.x, self.z, self.r):
+            table[[a, b]] = table[[b, a]]
+
+    def support(self):
+        """Returns (offset, basis): Z-basis outcomes are offset XOR any GF(2) combination of basis rows."""
+        tableau = self.copy()
+        n = self.num_qubits
+
+        # Forward elimination on the X part; its row space spans the random outcomes
+        rank = 0
+        for column in range(n):
+            candidates = np.flatnonzero(tableau.x[rank:, column])
+            if candidates.size == 0:
+                continue
+            tableau._swap_rows(rank, rank + candidates[0])
+            below = np.flatnonzero(tableau.x[rank + 1:, column]) + rank + 1
+            if below.size:
+                tableau._multiply_rows(below, rank)
+            rank += 1
+            if rank == n:
+                break
+
+        # The remaining generators are +/-Z strings: parity constraints z.b = r on the outcome b.
+        # Products of Z strings never pick up a phase, so plain XOR is enough here.
+        z, r = tableau.z[rank:], tableau.r[rank:]
+        pivots = []
+        row = 0
+        for column in range(n):
+            if row == len(z):
+                break
+            candidates = np.flatnonzero(z[row:, column])
+            if candidates.size == 0:
+                continue
+            pivot = row + candidates[0]
+            z[[row, pivot]], r[[row, pivot]] = z[[pivot, row]], r[[pivot, row]]
+            below = np.flatnonzero(z[row + 1:, column]) + row + 1
+            z[below] ^= z[row]
+            r[below] ^= r[row]
+            pivots.append(column)
+            row += 1
+
+        # Back-substitution with every free bit set to 0
+        offset = np.zeros(n, dtype=bool)
+        for row in range(len(pivots) - 1, -1, -1):
+            column = pivots[row]
+            offset[column] = r[row] ^ (np.count_nonzero(z[row, column + 1:] & offset[column + 1:]) % 2)
+
+        return offset, tableau.x[:rank].copy()
+
+    def sample(self, shots, rng, support=None):
+        """Samples Z-basis measurements of every qubit; returns a (shots, num_qubits) bool array."""
+        offset, basis = support if support is not None else self.support()
+        if basis.shape[0] == 0:
+            return np.broadcast_to(offset, (shots, self.num_qubits)).copy()
+        coefficients = rng.integers(0, 2, size=(shots, basis.shape[0]), dtype=np.uint8)
+        # float32 matmul is exact here and much faster than integer matmul
+        parity = (coefficients.astype(np.float32) @ basis.astype(np.float32)) % 2
+        return parity.astype(bool) ^ offset
+
+
+# Gate name -> tableau method
+CLIFFORD_GATES = {
+    "h": "h",
+    "s": "s",
+    "sdg": "sdg",
+    "x": "x_gate",
+    "y": "y_gate",
+    "z": "z_gate",
+    "cx": "cx",
+    "id": None,
+}
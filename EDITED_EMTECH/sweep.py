@@ -0,0 +1,101 @@
+import csv
+import functools
+import numpy as np
+from qiskit.quantum_info import hellinger_fidelity
+import engine
+import simulation
+import workers
+
+# Columns of a sweep result, in export order
+COLUMNS = ["qubits", "noise", "noise_type", "hadamard", "cnot", "pauli_x", "shots", "seed",
+           "engine", "outcomes", "top_outcome", "top_probability", "fidelity"]
+
+# Largest register whose noiseless reference distribution is computed exactly (2^n probabilities)
+MAX_EXACT_REFERENCE_QUBITS = 20
+
+
+# Function to read a range typed into an entry
+def parse_range(text, integer=False, default_steps=5):
+    """Parses "a", "a-b" or "a-b:steps" into a list of values; integer ranges step by 1 by default."""
+    text = text.strip()
+    bounds, _, steps = text.partition(":")
+    start, _, stop = bounds.partition("-")
+    convert = int if integer else float
+    start = convert(start)
+    stop = convert(stop) if stop else start
+    if stop < start:
+        raise ValueError(f"Range '{text}' ends before it starts.")
+    if integer and not steps:
+        return list(range(start, stop + 1))
+    count = int(steps) if steps else (default_steps if stop > start else 1)
+    values = np.linspace(start, stop, count)
+    return sorted({int(round(v)) for v in values}) if integer else [round(float(v), 10) for v in values]
+
+
+# Function to list every configuration of a sweep
+def configurations(qubit_values, noise_values, hadamard, cnot, pauli_x, shots, seed=None, noise_type="bit_flip"):
+    """Returns one dict per (qubits, noise) pair with its own seed drawn from the sweep seed."""
+    pairs = [(q, noise) for q in qubit_values for noise in noise_values]
+    seeds = np.random.SeedSequence(seed).generate_state(len(pairs))
+    return [{"qubits": q, "noise": noise, "noise_type": noise_type, "hadamard": hadamard, "cnot": cnot,
+             "pauli_x": pauli_x, "shots": shots, "seed": int(s)} for (q, noise), s in zip(pairs, seeds)]
+
+
+# Function to get the noiseless output distribution of an interference circuit
+@functools.lru_cache(maxsize=64)
+def reference_distribution(num_qubits, hadamard, cnot, pauli_x, shots):
+    """Exact probabilities for small registers, otherwise counts of a sampled run with the same shots."""
+    reference = simulation.interference_circuit(num_qubits, hadamard, cnot, pauli_x)
+    if num_qubits <= MAX_EXACT_REFERENCE_QUBITS:
+        state = engine.get_engine("numpy").run_statevector(reference)
+        return engine.probabilities_dict(state, num_qubits)
+    return simulation.sample(reference, shots, seed=0, use_cache=False)[1]
+
+
+# Function to run one configuration of a sweep (worker entry point, runs in a worker process)
+def run_configuration(config):
+    """Simulates one configuration and returns its result row."""
+    result = simulation.run(dict(config, circuit="interference", output="counts"))
+    counts = result["counts"]
+    top = max(counts, key=counts.get)
+    reference = reference_distribution(config["qubits"], config["hadamard"], config["cnot"],
+                                       config["pauli_x"], config["shots"])
+    return dict(config, engine=result["engine"], outcomes=len(counts), top_outcome=top,
+                top_probability=counts[top] / config["shots"],
+                fidelity=hellinger_fidelity(counts, reference))
+
+
+# Function to run a whole sweep on the process pool (called from a worker thread)
+def run_sweep(configs, cancelled=None):
+    """Runs every configuration in parallel and returns the rows in configuration order.
+
+    When the cancelled event is set, the configurations not started yet are dropped and the rows so far
+    are returned.
+    """
+    return list(workers.stream(run_configuration, configs, cancelled=cancelled))
+
+
+# Function to arrange sweep rows as a qubits x noise grid
+def grid(rows, column="fidelity"):
+    """Returns (qubit values, noise values, 2D array of the column) for a heatmap."""
+    qubit_values = sorted({row["qubits"] for row in rows})
+    noise_values = sorted({row["noise"] for row in rows})
+    values = np.full((len(qubit_values), len(noise_values)), np.nan)
+    for row in rows:
+        values[qubit_values.index(row["qubits"]), noise_values.index(row["noise"])] = row[column]
+    return qubit_values, noise_values, values
+
+
+# Function to save sweep results
+def export_rows(rows, path):
+    """Writes the rows to CSV, or to Parquet when the path ends in .parquet (needs pyarrow)."""
+    if path.endswith(".parquet"):
+        import pyarrow
+        import pyarrow.parquet
+        table = pyarrow.table({column: [row[column] for row in rows] for column in COLUMNS})
+        pyarrow.parquet.write_table(table, path)
+        return
+    with open(path, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
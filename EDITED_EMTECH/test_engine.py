@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Pauli, Statevector, random_unitary
+import engine
+
+# Checks of the NumPy engine helpers against Qiskit. Run with: python -m pytest
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_bloch_rotation_turns_bloch_vectors(seed):
+    matrix = random_unitary(2, seed=seed).data
+    axis, angle = engine.bloch_rotation(matrix)
+    assert np.isclose(np.linalg.norm(axis), 1) and 0 <= angle <= np.pi
+
+    paulis = [Pauli(label) for label in "XYZ"]
+    for state in (Statevector.from_label(label) for label in "0+r"):
+        before = np.array([state.expectation_value(pauli).real for pauli in paulis])
+        after = np.array([state.evolve(matrix).expectation_value(pauli).real for pauli in paulis])
+        # Rodrigues' formula for a rotation by angle about axis
+        rotated = (before * np.cos(angle) + np.cross(axis, before) * np.sin(angle)
+                   + axis * np.dot(axis, before) * (1 - np.cos(angle)))
+        assert np.allclose(rotated, after, atol=1e-9)
+
+
+def test_aer_sampler_runs_non_unitary_circuits_shot_by_shot():
+    qc = QuantumCircuit(2, 2)
+    qc.h(0)
+    qc.cx(0, 1)
+    qc.reset(0)
+    qc.measure(range(2), range(2))
+    assert not engine.samples_analytically(qc)
+    counts = engine.get_engine("aer").run_counts(qc, 2000, seed=1)
+    assert set(counts) == {"00", "10"} and abs(counts["00"] - 1000) < 150
+
+    unitary = qc.copy_empty_like()
+    unitary.h(0)
+    unitary.rx(0.3, 1)
+    unitary.barrier()
+    unitary.measure(range(2), range(2))
+    assert engine.samples_analytically(unitary)
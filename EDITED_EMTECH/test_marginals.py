@@ -0,0 +1,44 @@
+import numpy as np
+import pytest
+from qiskit.quantum_info import DensityMatrix, Pauli, SparsePauliOp, Statevector, partial_trace
+from qiskit.quantum_info import concurrence as qiskit_concurrence
+import engine
+import marginals
+
+# Checks of the pair states and correlations against Qiskit's partial traces. Run with: python -m pytest
+
+
+# Function to draw a random normalized statevector
+def random_state(num_qubits, seed):
+    rng = np.random.default_rng(seed)
+    state = rng.normal(size=2 ** num_qubits) + 1j * rng.normal(size=2 ** num_qubits)
+    return state / np.linalg.norm(state)
+
+
+@pytest.mark.parametrize("num_qubits", [2, 3, 5])
+def test_marginals_match_partial_trace(num_qubits):
+    state = random_state(num_qubits, num_qubits)
+    pairs = marginals.pair_states(state, num_qubits)
+    vectors, zz, entanglement = marginals.correlations(state, num_qubits)
+    reference = Statevector(state)
+    for i in range(num_qubits):
+        single = partial_trace(reference, [q for q in range(num_qubits) if q != i])
+        expected = [single.expectation_value(Pauli(label)).real for label in "XYZ"]
+        assert np.allclose(vectors[i], expected)
+        for j in range(i + 1, num_qubits):
+            rho = partial_trace(reference, [q for q in range(num_qubits) if q not in (i, j)])
+            assert np.allclose(pairs[i, j], rho.data)
+            assert np.allclose(pairs[j, i], rho.data[np.ix_([0, 2, 1, 3], [0, 2, 1, 3])])
+            operator = SparsePauliOp.from_sparse_list([("ZZ", [i, j], 1)], num_qubits)
+            assert np.isclose(zz[i, j], reference.expectation_value(operator).real)
+            assert np.isclose(zz[j, i], zz[i, j])
+            assert np.isclose(entanglement[i, j], qiskit_concurrence(DensityMatrix(rho.data)), atol=1e-6)
+    assert np.allclose(np.diag(zz), 1) and np.isnan(np.diag(entanglement)).all()
+
+
+def test_large_registers_only_get_bloch_vectors(monkeypatch):
+    monkeypatch.setattr(marginals, "MAX_PAIR_QUBITS", 3)
+    state = random_state(4, 4)
+    vectors, zz, entanglement = marginals.correlations(state, 4)
+    assert np.allclose(vectors, engine.bloch_vectors(state, 4))
+    assert zz is None and entanglement is None
@@ -0,0 +1,27 @@
+import pytest
+from qiskit import QuantumCircuit
+import noise
+import session
+
+# Checks of the Pauli-frame noise against Aer with the equivalent noise model. Run with: python -m pytest
+
+
+@pytest.mark.parametrize("model", [noise.NoiseModel(bit_flip=0.05),
+                                   noise.NoiseModel(depolarizing=0.08),
+                                   noise.NoiseModel(bit_flip=0.02, depolarizing=0.04, readout=0.03)])
+def test_noise_frames_match_aer(model):
+    from qiskit_aer import AerSimulator
+    qc = QuantumCircuit(3, 3)
+    qc.h(0)
+    qc.cx(0, 1)
+    qc.s(1)
+    qc.h(1)
+    qc.cz(1, 2)
+    qc.swap(0, 2)
+    qc.measure(range(3), range(3))
+    assert noise.supports_frames(qc)
+
+    shots = 40000
+    frames = noise.run_counts(qc, model, shots, seed=1)
+    reference = AerSimulator(noise_model=model.to_aer()).run(qc, shots=shots, seed_simulator=1).result().get_counts()
+    assert session.agreement(frames, reference)[1] < 0.02
@@ -0,0 +1,25 @@
+import tkinter as tk
+import numpy as np
+import pytest
+import render
+
+# Checks of the Tk views; they need a display and are skipped without one. Run with: python -m pytest
+
+
+def test_bloch_view_widget_follows_the_figure():
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        pytest.skip("no display")
+    try:
+        view = render.BlochView(root)
+        view.widget.pack()
+        for num_qubits in (2, 1):
+            view.update(np.eye(2 ** num_qubits, 1, dtype=complex).ravel())
+            root.update()
+            width, height = view.canvas.get_width_height(physical=True)
+            x1, y1, x2, y2 = view.widget.bbox("all")  # The photo image the figure is blitted into
+            assert width == view.widget.winfo_width() == x2 - x1
+            assert height == view.widget.winfo_height() == y2 - y1
+    finally:
+        root.destroy()
@@ -0,0 +1,54 @@
+import os
+from qiskit import QuantumCircuit
+import engine
+import noise
+import session
+import workers
+
+# Checks that recorded sessions replay to the same results. Run with: python -m pytest
+
+
+# Function to build a small entangling circuit, measured or not
+def ghz_circuit(measure=False):
+    qc = QuantumCircuit(3, 3 if measure else 0)
+    qc.h(0)
+    qc.cx(0, 1)
+    qc.s(1)
+    qc.cx(1, 2)
+    if measure:
+        qc.measure(range(3), range(3))
+    return qc
+
+
+# Function to record a statevector run and a seeded counts run into the open session
+def record_runs(qc, measured, seed):
+    model = noise.NoiseModel(bit_flip=0.01)
+    sim = engine.get_engine("numpy")
+    session.record("mqb_h", qc, "statevector", sim.name, sim.run_statevector(qc), 0.01, dtype="complex128")
+    counts = workers.run_counts(sim.name, measured, 500, seed, model)
+    session.record("interference", measured, "counts", sim.name, counts, 0.01, 500, seed, noise=model.key())
+
+
+def test_session_replay_round_trip(tmp_path):
+    path = str(tmp_path / "session.qlog")
+    qc, measured = ghz_circuit(), ghz_circuit(measure=True)
+    try:
+        session.start(path)
+        record_runs(qc, measured, seed=5)
+        session.stop()
+
+        # A record cut short by a crash is dropped, and the next session appends after the last whole one
+        size = os.path.getsize(path)
+        with open(path, "ab") as file:
+            file.write(session.HEADER.pack(b"R", 100) + b"partial")
+        session.start(path)
+        record_runs(qc, measured, seed=6)
+    finally:
+        session.stop()
+
+    runs, circuits, end = session.load(path)
+    assert end == os.path.getsize(path) > size
+    assert len(runs["fields"]) == 4 and len(circuits) == 2
+    rows = list(session.replay(path, compare_engine="aer"))
+    assert [row["status"] for row in rows] == ["match"] * 4
+    assert all(row["fidelity"] > 1 - 1e-9 for row in rows if row["kind"] == "statevector")
@@ -0,0 +1,91 @@
+from collections import Counter
+import numpy as np
+import pytest
+from qiskit import QuantumCircuit
+from qiskit.quantum_info import Statevector
+import engine
+import session
+import stabilizer
+
+# Checks of the stabilizer engine and its bit packing against Qiskit and Aer. Run with: python -m pytest
+
+
+# Function to build a random Clifford circuit from the gates the tableau knows
+def random_clifford(num_qubits, num_gates, seed, measure=False):
+    rng = np.random.default_rng(seed)
+    single = [name for name in stabilizer.CLIFFORD_GATES if name != "cx"]
+    qc = QuantumCircuit(num_qubits, num_qubits if measure else 0)
+    for _ in range(num_gates):
+        if rng.random() < 0.4:
+            control, target = rng.choice(num_qubits, 2, replace=False)
+            qc.cx(int(control), int(target))
+        else:
+            getattr(qc, str(rng.choice(single)))(int(rng.integers(num_qubits)))
+    if measure:
+        qc.measure(range(num_qubits), range(num_qubits))
+    return qc
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_stabilizer_support_matches_statevector(seed):
+    qc = random_clifford(5, 40, seed)
+    tableau, _ = engine.StabilizerEngine().evolve(qc)
+    offset, basis = tableau.support()
+    combinations = (np.arange(2 ** len(basis))[:, None] >> np.arange(len(basis))) & 1
+    outcomes = ((combinations @ basis.astype(int)) % 2).astype(bool) ^ offset
+    keys = set(engine.bits_to_keys(outcomes))
+
+    probabilities = Statevector(qc).probabilities_dict()
+    assert keys == {key for key, p in probabilities.items() if p > 1e-9}
+    assert all(np.isclose(probabilities[key], 0.5 ** len(basis)) for key in keys)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_stabilizer_counts_match_statevector(seed):
+    qc = random_clifford(4, 30, seed, measure=True)
+    counts = engine.StabilizerEngine().run_counts(qc, 20000, seed=seed)
+    expected = Statevector(qc.remove_final_measurements(inplace=False)).probabilities_dict()
+    assert session.agreement(counts, expected)[1] < 0.03
+
+
+@pytest.mark.parametrize("shots", [1000, 2 ** 20])
+def test_stabilizer_draws_large_outcome_spaces_directly(shots):
+    # 2^18 equally likely outcomes: the CX, S and X gates only permute and phase the Hadamard superposition
+    rng = np.random.default_rng(3)
+    qc = QuantumCircuit(19, 19)
+    qc.h(range(18))
+    for _ in range(30):
+        control, target = rng.choice(19, 2, replace=False)
+        qc.cx(int(control), int(target))
+        qc.s(int(target))
+        qc.x(int(control))
+    qc.measure(range(19), range(19))
+    sim = engine.StabilizerEngine()
+    tableau, _ = sim.evolve(qc)
+    rank = len(tableau.support()[1])
+    assert 2 ** rank * qc.num_qubits > sim.max_enumerated_bits  # Not the precomputed-keys path
+
+    counts = sim.run_counts(qc, shots, seed=1)
+    probabilities = Statevector(qc.remove_final_measurements(inplace=False)).probabilities()
+    assert sum(counts.values()) == shots
+    assert np.allclose(probabilities[[int(key, 2) for key in counts]], 0.5 ** rank)
+    if shots >= 2 ** rank:
+        assert len(counts) > 0.9 * 2 ** rank
+
+
+@pytest.mark.parametrize("width", [1, 7, 64, 65, 130])
+def test_counts_from_bits_matches_row_strings(width):
+    bits = np.random.default_rng(width).random((3000, width)) < 0.5
+    bits[:1000] = bits[0]  # Some repeated rows
+    expected = Counter("".join("1" if bit else "0" for bit in row[::-1]) for row in bits)
+    assert engine.counts_from_bits(bits) == dict(expected)
+
+
+def test_counts_from_bits_keys_match_aer():
+    from qiskit_aer import AerSimulator
+    qc = QuantumCircuit(3, 3)
+    qc.x(0)
+    qc.h(2)
+    qc.measure(range(3), range(3))
+    counts = engine.counts_from_bits(engine.NumpyEngine().bit_sampler(qc, seed=3)(500))
+    assert set(counts) == set(AerSimulator().run(qc, shots=500, seed_simulator=3).result().get_counts())
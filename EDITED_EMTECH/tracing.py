@@ -0,0 +1,230 @@
+import collections
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+ENABLED = False  # Checked before any work, so disabled tracing costs one global lookup
+TRACE_MEMORY = False  # Peak memory per operation via tracemalloc (slows allocation down)
+MAX_EVENTS = 100_000  # Events kept for the Chrome trace; older ones are dropped
+HISTORY = 1000  # Durations kept per stage for the percentiles
+
+_events = collections.deque(maxlen=MAX_EVENTS)
+_durations = collections.defaultdict(lambda: collections.deque(maxlen=HISTORY))
+_peaks = {}  # Stage -> peak bytes of its last traced run
+_lock = threading.Lock()
+_local = threading.local()  # Per-thread stack of running memory peaks
+_started_tracemalloc = False
+_NULL_SPAN = contextlib.nullcontext()
+
+
+# Functions to switch tracing on and off
+def enable(memory=False):
+    """Starts recording spans; memory=True also records peak traced memory per span."""
+    global ENABLED, TRACE_MEMORY, _started_tracemalloc
+    ENABLED = True
+    TRACE_MEMORY = memory
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracemalloc = True
+
+
+def disable():
+    """Stops recording; what was recorded stays available until clear()."""
+    global ENABLED, TRACE_MEMORY, _started_tracemalloc
+    ENABLED = False
+    TRACE_MEMORY = False
+    if _started_tracemalloc:
+        tracemalloc.stop()
+        _started_tracemalloc = False
+
+
+def clear():
+    """Forgets every recorded event and duration."""
+    with _lock:
+        _events.clear()
+        _durations.clear()
+        _peaks.clear()
+
+
+# Function to add one finished operation
+def record(name, start, end, peak_bytes=None, pid=None, tid=None):
+    """Records an operation that ran from start to end (time.perf_counter() seconds)."""
+    event = {"name": name, "ph": "X", "ts": start * 1e6, "dur": (end - start) * 1e6,
+             "pid": pid or os.getpid(), "tid": tid or threading.get_ident()}
+    if peak_bytes is not None:
+        event["args"] = {"peak_bytes": peak_bytes}
+    with _lock:
+        _events.append(event)
+        _durations[name].append(end - start)
+        if peak_bytes is not None:
+            _peaks[name] = peak_bytes
+
+
+# Function to add operations recorded somewhere else (e.g. in a worker process)
+def merge(events):
+    """Adds Chrome trace events recorded by another process."""
+    for event in events:
+        peak = event.get("args", {}).get("peak_bytes")
+        start = event["ts"] / 1e6
+        record(event["name"], start, start + event["dur"] / 1e6, peak, event["pid"], event["tid"])
+
+
+class _Span:
+    """Times one operation and, with TRACE_MEMORY, its peak traced memory above what was in use at the start.
+
+    Nested spans on one thread each get their own peak: a span resets the
+    tracemalloc peak on entry and hands its own peak up to the enclosing span.
+    Spans running at the same time on different threads share tracemalloc, so
+    their peaks are approximate.
+    """
+
+    __slots__ = ("name", "start", "base", "peak", "memory")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.memory = TRACE_MEMORY and tracemalloc.is_tracing()
+        if self.memory:
+            stack = getattr(_local, "stack", None)
+            if stack is None:
+                stack = _local.stack = []
+            self.base, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            stack.append(self)
+            self.peak = self.base
+            tracemalloc.reset_peak()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        peak = None
+        if self.memory:
+            peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            _local.stack.pop()
+            if _local.stack:
+                _local.stack[-1].peak = max(_local.stack[-1].peak, peak)
+            peak -= self.base
+        record(self.name, self.start, end, peak)
+        return False
+
+
+# Function to time a block of code
+def span(name):
+    """Context manager that records the block as one operation; a shared no-op while tracing is off."""
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(name)
+
+
+# Decorator to time every call of a function
+def traced(name=None):
+    """Records each call as an operation named module.function (or name)."""
+    def decorator(function):
+        label = name or f"{function.__module__}.{function.__qualname__}"
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return function(*args, **kwargs)
+            with _Span(label):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# Functions to trace pool jobs (see workers.SimulationRunner.submit and workers.stream)
+def job_name(function):
+    """Returns module.function for a job submitted to a pool."""
+    return f"{getattr(function, '__module__', None) or 'builtins'}.{getattr(function, '__qualname__', 'job')}"
+
+
+def _run_in_span(name, function, *args):
+    with span(name):
+        return function(*args)
+
+
+def run_traced(name, memory, function, *args):
+    """Worker-process entry point: runs function with tracing on and returns (result, events).
+
+    The worker's previous tracing state is restored afterwards, so it stops
+    recording once jobs are no longer submitted with tracing on.
+    """
+    global ENABLED, TRACE_MEMORY, _started_tracemalloc
+    previous = ENABLED, TRACE_MEMORY, tracemalloc.is_tracing()
+    enable(memory)
+    clear()  # A worker process runs one job at a time, so everything recorded belongs to this job
+    try:
+        with _Span(name):
+            result = function(*args)
+        return result, list(_events)
+    finally:
+        ENABLED, TRACE_MEMORY, was_tracing = previous
+        if not was_tracing and tracemalloc.is_tracing():
+            tracemalloc.stop()
+            _started_tracemalloc = False
+
+
+def trace_job(function, args, on_done, in_process):
+    """Wraps a job so its run (even in another process) and its submit-to-result latency are recorded.
+
+    Returns the (function, args, on_done) to submit instead.
+    """
+    name = job_name(function)
+    submitted = time.perf_counter()
+
+    def done(result):
+        if in_process:
+            result, events = result
+            merge(events)
+        record(f"{name} (submit to result)", submitted, time.perf_counter())
+        on_done(result)
+    if in_process:
+        return run_traced, (name, TRACE_MEMORY, function, *args), done
+    return _run_in_span, (name, function, *args), done
+
+
+# Function to summarize the recorded durations
+def stats():
+    """Returns {stage: {"count", "last", "p50", "p95", "peak_bytes"}} with times in seconds."""
+    with _lock:
+        durations = {name: list(values) for name, values in _durations.items()}
+        peaks = dict(_peaks)
+    summary = {}
+    for name, values in durations.items():
+        ordered = sorted(values)
+        summary[name] = {
+            "count": len(values),
+            "last": values[-1],
+            "p50": ordered[int(0.50 * (len(ordered) - 1))],
+            "p95": ordered[int(0.95 * (len(ordered) - 1))],
+            "peak_bytes": peaks.get(name),
+        }
+    return summary
+
+
+# Function to format the summary as a table
+def summary_text(limit=15):
+    """Returns the slowest stages (by p95) as fixed-width text with times in milliseconds."""
+    rows = sorted(stats().items(), key=lambda item: item[1]["p95"], reverse=True)[:limit]
+    lines = [f"{'stage':<48} {'n':>5} {'last':>8} {'p50':>8} {'p95':>8} {'peak MB':>8}"]
+    for name, row in rows:
+        peak = f"{row['peak_bytes'] / 2 ** 20:8.1f}" if row["peak_bytes"] is not None else f"{'-':>8}"
+        lines.append(f"{name[-48:]:<48} {row['count']:>5} {row['last'] * 1e3:8.1f} "
+                     f"{row['p50'] * 1e3:8.1f} {row['p95'] * 1e3:8.1f} {peak}")
+    return "\n".join(lines)
+
+
+# Function to save the events for chrome://tracing or Perfetto
+def export(path):
+    """Writes the recorded events as Chrome trace-event JSON."""
+    with _lock:
+        events = list(_events)
+    with open(path, "w") as file:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
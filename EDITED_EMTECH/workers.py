@@ -0,0 +1,248 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import resource_tracker, shared_memory
+import collections
+import functools
+import itertools
+import os
+import threading
+import weakref
+import numpy as np
+import cache
+import engine
+import noise
+import tracing
+
+# Shared executors, created on first use; one core is left for the Tk thread
+WORKER_COUNT = max(1, (os.cpu_count() or 2) - 1)
+_pools = {}
+
+# Statevectors of this many qubits or more (16 MiB as complex128) are computed by process-pool
+# engines straight into shared memory, so they are never pickled back to the Tk process
+SHARED_STATE_QUBITS = 20
+
+
+# Function to get (or create) a shared executor
+def get_pool(kind):
+    """Returns the shared "thread", "process" or "serial" executor.
+
+    The serial executor is a single thread, so its jobs run one at a time in the order submitted.
+    """
+    if kind not in _pools:
+        if kind == "process":
+            if os.name == "posix":
+                # Start the resource tracker before the workers exist, so they report shared-memory
+                # blocks to it instead of each starting their own (see _attach)
+                resource_tracker.ensure_running()
+            _pools[kind] = ProcessPoolExecutor(max_workers=WORKER_COUNT)
+        elif kind == "serial":
+            _pools[kind] = ThreadPoolExecutor(max_workers=1, thread_name_prefix="serial")
+        else:
+            _pools[kind] = ThreadPoolExecutor(max_workers=WORKER_COUNT, thread_name_prefix="simulation")
+    return _pools[kind]
+
+
+# Function to shut every executor down (called when the application exits)
+def shutdown():
+    """Stops the shared executors without waiting for running jobs."""
+    for pool in _pools.values():
+        pool.shutdown(wait=False, cancel_futures=True)
+    _pools.clear()
+
+
+# Function to run many jobs in parallel and hand results back as they are ready
+def stream(function, items, pool="process", window=None, cancelled=None):
+    """Yields function(item) for every item, in order, while later items are still running.
+
+    items is read lazily, at most window items ahead of the result being yielded (several per worker by
+    default), so results come out before a long or unbounded input has been read in full. Once the
+    cancelled event (a threading.Event) is set, no more results are waited for and pending items are dropped.
+    """
+    window = window or WORKER_COUNT * 4
+    executor = get_pool(pool)
+    traced = tracing.ENABLED and pool == "process"
+    if traced:
+        # Worker processes send the spans they recorded back with each result
+        function = functools.partial(tracing.run_traced, tracing.job_name(function), tracing.TRACE_MEMORY, function)
+    iterator = iter(items)
+    pending = collections.deque()
+    try:
+        while cancelled is None or not cancelled.is_set():
+            for item in itertools.islice(iterator, window - len(pending)):
+                pending.append(executor.submit(function, item))
+            if not pending:
+                return
+            result = pending.popleft().result()
+            if traced:
+                result, events = result
+                tracing.merge(events)
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()  # The consumer stopped early
+
+
+# Function to allocate an array that worker processes can write into
+def shared_array(length, dtype=complex):
+    """Returns (array, block name) for a new shared-memory block owned by this process.
+
+    The block is released when the array and every view of it are garbage collected (or at exit).
+    """
+    dtype = np.dtype(dtype)
+    block = shared_memory.SharedMemory(create=True, size=max(1, length * dtype.itemsize))
+    array = np.ndarray((length,), dtype, buffer=block.buf)
+    weakref.finalize(array, _release, block)
+    return array, block.name
+
+
+def _release(block):
+    block.close()
+    block.unlink()
+
+
+def _attach(name):
+    """Opens a block created by shared_array() without becoming one of its owners."""
+    try:
+        return shared_memory.SharedMemory(name, track=False)  # Python 3.13+
+    except TypeError:
+        # Pool workers report to the resource tracker of the Tk process (started in get_pool), which
+        # already tracks the block, so attaching does not make the block outlive (or die with) the worker
+        return shared_memory.SharedMemory(name)
+
+
+# Worker entry points; kept at module level so the process pool can pickle them
+def run_statevector(engine_name, qc, dtype=complex):
+    """Runs a circuit on the named engine and returns its statevector."""
+    return engine.get_engine(engine_name).run_statevector(qc, dtype)
+
+
+def run_statevector_shared(engine_name, qc, block_name, dtype):
+    """Runs a circuit on the named engine, evolving its statevector in place in a shared-memory block."""
+    block = _attach(block_name)
+    try:
+        state = np.ndarray((2 ** qc.num_qubits,), np.dtype(dtype), buffer=block.buf)
+        engine.get_engine(engine_name).run_statevector(qc, state.dtype, out=state)
+        del state  # Release the buffer before closing the block
+    finally:
+        block.close()
+
+
+def run_counts(engine_name, qc, shots, seed=None, noise_model=None):
+    """Runs a circuit on the named engine and returns its measurement counts, with per-shot noise if given."""
+    if noise_model is not None and not noise_model.ideal:
+        return noise.run_counts(qc, noise_model, shots, seed, engine_name)
+    return engine.get_engine(engine_name).run_counts(qc, shots, seed)
+
+
+class SimulationRunner:
+    """Runs simulations off the Tk thread and hands the newest result back to it.
+
+    Results are polled with widget.after() so callbacks always run on the Tk
+    thread. Submitting a new job supersedes the previous one: its result is
+    dropped even if the worker still finishes it. Jobs on the "serial" pool are
+    never stopped, because later jobs build on what they change; only the
+    display of their result is superseded.
+    """
+
+    poll_ms = 16  # About one frame at 60 fps
+
+    def __init__(self, widget):
+        self.widget = widget
+        self.generation = 0
+        self.future = None
+        self.serial = False  # Whether the current job runs on the serial pool
+        self.cancelled = None  # Event of the current cancellable job
+
+    @property
+    def busy(self):
+        """True while a submitted job has not been delivered or cancelled."""
+        return self.future is not None
+
+    def submit(self, function, *args, on_done, on_error=None, pool="thread"):
+        """Runs function(*args) on the given pool and calls on_done(result) on the Tk thread."""
+        self.cancel()
+        generation = self.generation
+        if tracing.ENABLED:
+            function, args, on_done = tracing.trace_job(function, args, on_done, pool == "process")
+        self.future = get_pool(pool).submit(function, *args)
+        self.serial = pool == "serial"
+        self.widget.after(self.poll_ms, self._poll, self.future, generation, on_done, on_error)
+
+    def submit_cancellable(self, function, *args, on_done, on_error=None):
+        """Like submit on the thread pool, but function also gets a threading.Event as its last argument.
+
+        The event is set when the job is cancelled or superseded, so a long job (a sweep) can stop
+        between its steps instead of running to the end for a result that is dropped.
+        """
+        cancelled = threading.Event()
+        self.submit(function, *args, cancelled, on_done=on_done, on_error=on_error)
+        self.cancelled = cancelled
+
+    def submit_simulation(self, sim, function, *args, on_done, on_error=None):
+        """Submits one of the worker entry points on the pool that suits the engine."""
+        self.submit(function, sim.name, *args, on_done=on_done, on_error=on_error, pool=sim.executor)
+
+    def submit_cached(self, key, sim, function, *args, on_done, on_error=None):
+        """Like submit_simulation, but answers from the result cache when it can and fills it otherwise.
+
+        A key of None means the result must not be cached (an unseeded run), so the job always runs.
+        """
+        results = cache.get_cache()
+        cached = results.get(key) if key is not None else None
+        if cached is not None:
+            self.cancel()  # A cached answer still supersedes the job in flight
+            on_done(cached)
+            return
+
+        def store(result):
+            if key is not None:
+                results.put(key, result)
+            on_done(result)
+        self.submit_simulation(sim, function, *args, on_done=store, on_error=on_error)
+
+    def submit_statevector(self, key, sim, qc, dtype, on_done, on_error=None):
+        """Like submit_cached for run_statevector; large states from process-pool engines come back through
+        shared memory, so the Tk process reads them without copying."""
+        results = cache.get_cache()
+        cached = results.get(key)
+        if cached is not None:
+            self.cancel()
+            on_done(cached)
+            return
+        if sim.executor == "process" and qc.num_qubits >= SHARED_STATE_QUBITS:
+            state, block_name = shared_array(2 ** qc.num_qubits, dtype)
+            function, args = run_statevector_shared, (qc, block_name, state.dtype.str)
+        else:
+            state, function, args = None, run_statevector, (qc, dtype)
+
+        def store(result):
+            result = state if state is not None else result
+            results.put(key, result)
+            on_done(result)
+        self.submit_simulation(sim, function, *args, on_done=store, on_error=on_error)
+
+    def cancel(self):
+        """Drops the current job; it is also stopped if it has not started yet (unless it is on the serial
+        pool), and a cancellable job is told to stop."""
+        self.generation += 1
+        if self.cancelled is not None:
+            self.cancelled.set()
+            self.cancelled = None
+        if self.future is not None:
+            if not self.serial:
+                self.future.cancel()
+            self.future = None
+
+    def _poll(self, future, generation, on_done, on_error):
+        if generation != self.generation:
+            return  # Superseded or cancelled
+        if not future.done():
+            self.widget.after(self.poll_ms, self._poll, future, generation, on_done, on_error)
+            return
+        self.future = None
+        error = future.exception()
+        if error is None:
+            on_done(future.result())
+        elif on_error is not None:
+            on_error(error)
+        else:
+            raise error